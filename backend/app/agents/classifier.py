@@ -1,10 +1,13 @@
 # same content as your current classifier.py, but model name from settings
 from __future__ import annotations
 from typing import Optional
+import hashlib, re, unicodedata
 from pydantic import BaseModel, Field
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, FewShotChatMessagePromptTemplate
 from ..config.settings import settings
+from .classifier_cache import ClassifierCache
+from .local_classifier import classify_local
 
 class ReportClassification(BaseModel):
     category: str = Field(..., description="taxonomy id like 'crime.gunshot'")
@@ -47,7 +50,38 @@ prompt = ChatPromptTemplate.from_messages([
   ("human", "{text}"),
 ])
 
+# Bump whenever SYSTEM/EXAMPLES/taxonomy change so cached answers are not reused
+PROMPT_VERSION = 1
+
 _model = ChatOpenAI(model=settings.OPENAI_MODEL_CLASSIFIER, temperature=0).with_structured_output(ReportClassification)
 
+CACHE = ClassifierCache(settings.CLASSIFIER_DB, settings.CLASSIFIER_CACHE_SIZE)
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+def cache_key(text: str) -> str:
+    raw = f"{settings.OPENAI_MODEL_CLASSIFIER}\x00{PROMPT_VERSION}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# which path answered: cache (memory or disk), local rules, or the LLM
+_served = {"cache": 0, "local": 0, "llm": 0}
+
 def classify_report_text(text: str) -> ReportClassification:
-    return (prompt | _model).invoke({"text": text})
+    """Cache, then local keyword rules, then the LLM only when the rules are unsure."""
+    key = cache_key(text)
+    hit = CACHE.get(key)
+    if hit is not None:
+        _served["cache"] += 1
+        return ReportClassification.model_validate(hit)
+    local = classify_local(normalize_text(text))
+    if local.confidence >= settings.CLASSIFIER_LOCAL_THRESHOLD:
+        _served["local"] += 1
+        return ReportClassification(**local._asdict())
+    _served["llm"] += 1
+    cls = (prompt | _model).invoke({"text": text})
+    CACHE.put(key, cls.model_dump())
+    return cls
+
+def stats() -> dict:
+    return {**CACHE.stats(), "served": dict(_served)}
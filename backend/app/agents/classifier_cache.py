@@ -0,0 +1,71 @@
+# backend/app/agents/classifier_cache.py
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+import json, sqlite3, threading, time
+
+class ClassifierCache:
+    """
+    Content-addressed memo for classifier results: an in-memory LRU in front of
+    an SQLite table, so duplicates are answered in microseconds and survive restarts.
+    Thread-safe; the add_report tool runs in worker threads.
+    """
+
+    def __init__(self, path: Path, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0        # served from memory
+        self.disk_hits = 0   # served from SQLite (then promoted to memory)
+        self.misses = 0
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS classifications (
+              key TEXT PRIMARY KEY,
+              result_json TEXT NOT NULL,
+              created_at INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            val = self._lru.get(key)
+            if val is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return val
+            row = self._conn.execute("SELECT result_json FROM classifications WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            val = json.loads(row[0])
+            self._remember(key, val)
+            self.disk_hits += 1
+            return val
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._remember(key, value)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO classifications (key, result_json, created_at) VALUES (?,?,?)",
+                    (key, json.dumps(value), int(time.time())),
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / total, 3) if total else 0.0,
+            "entries": len(self._lru),
+        }
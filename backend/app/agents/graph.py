@@ -5,8 +5,11 @@ from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+import asyncio, sqlite3
+import aiosqlite
 
 from .tools import TOOLS
 from ..config.settings import settings
@@ -55,14 +58,21 @@ class AgentState(TypedDict):
     user_location: Optional[Dict[str, float]]
     photo_url: Optional[str]
 
-def model_call(state: AgentState, config=None) -> AgentState:
+def _prompt(state: AgentState) -> List[BaseMessage]:
     loc = state.get("user_location")
     loc_hint = f"User location (fallback): lat={loc['lat']}, lon={loc['lon']}" if (loc and 'lat' in loc and 'lon' in loc) else "User location: unknown"
     photo = state.get("photo_url") or ""
     photo_hint = f"Photo URL available: {photo}" if photo else "No photo URL in context."
     system = SystemMessage(content=SYSTEM_PROMPT + "\n" + loc_hint + "\n" + photo_hint + "\nOnly call another tool if the user asks for more.")
-    msgs = [system, *state["messages"]]
-    ai_msg: AIMessage = model.invoke(msgs)
+    return [system, *state["messages"]]
+
+def model_call(state: AgentState, config=None) -> AgentState:
+    ai_msg: AIMessage = model.invoke(_prompt(state), config)
+    return {"messages": [ai_msg]}
+
+async def amodel_call(state: AgentState, config=None) -> AgentState:
+    # native async path: tokens stream to astream_events without holding a worker thread
+    ai_msg: AIMessage = await model.ainvoke(_prompt(state), config)
     return {"messages": [ai_msg]}
 
 def should_continue(state: AgentState) -> str:
@@ -72,7 +82,7 @@ def should_continue(state: AgentState) -> str:
     return "end"
 
 graph = StateGraph(AgentState)
-graph.add_node("agent", model_call)
+graph.add_node("agent", RunnableLambda(model_call, afunc=amodel_call))
 graph.add_node("tools", ToolNode(tools=TOOLS))
 graph.add_edge(START, "agent")
 graph.add_conditional_edges("agent", should_continue, {"continue": "tools", "end": END})
@@ -80,3 +90,25 @@ graph.add_edge("tools", "agent")
 
 checkpointer = SqliteSaver(conn)
 APP = graph.compile(checkpointer=checkpointer)
+
+# Async twin over the same sessions DB. The aiosqlite saver binds to the running
+# loop, so it is built on first use inside the server.
+_aconn: Optional[aiosqlite.Connection] = None
+_async_app = None
+_async_lock = asyncio.Lock()
+
+async def get_async_app():
+    global _aconn, _async_app
+    async with _async_lock:
+        if _async_app is None:
+            _aconn = await aiosqlite.connect(str(settings.SESSIONS_DB))
+            saver = AsyncSqliteSaver(_aconn)
+            await saver.setup()
+            _async_app = graph.compile(checkpointer=saver)
+    return _async_app
+
+async def close_async_app() -> None:
+    global _aconn, _async_app
+    if _aconn is not None:
+        await _aconn.close()
+    _aconn, _async_app = None, None
@@ -0,0 +1,107 @@
+# backend/app/agents/local_classifier.py
+from __future__ import annotations
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import re
+
+# category -> (label, default severity, [(pattern, weight)])
+# weight ~ how sure one match alone makes us; matches combine as 1 - prod(1 - w).
+# Ambiguous terms ("shooting" a film, a phone that "is missing", a flooded basement)
+# stay well under CLASSIFIER_LOCAL_THRESHOLD so only a second match carries them over.
+RULES: Dict[str, Tuple[str, Optional[str], List[Tuple[str, float]]]] = {
+    "crime.gunshot": ("Gunshots reported", "high", [
+        (r"\bgun ?shots?\b", 0.95), (r"\bshots? (fired|heard)\b", 0.95), (r"\bshooting\b", 0.55),
+        (r"\bgunfire\b", 0.95), (r"\bshot at\b", 0.8),
+    ]),
+    "crime.robbery": ("Robbery reported", "high", [
+        (r"\brobb(ed|ery|ing)\b", 0.9), (r"\bmugg(ed|ing)\b", 0.9), (r"\bheld up\b", 0.8),
+        (r"\b(stole|stolen|theft|burglar\w*|break[- ]in)\b", 0.75), (r"\bcarjack\w*\b", 0.9),
+    ]),
+    "crime.sex_offender": ("Sex offender concern", "high", [
+        (r"\bsex(ual)? offender\b", 0.95), (r"\bindecent exposure\b", 0.9), (r"\bflash(er|ed|ing)\b", 0.7),
+    ]),
+    "crime.suspicious": ("Suspicious activity", "medium", [
+        (r"\bsuspicious\b", 0.85), (r"\bprowl(er|ing)\b", 0.85), (r"\bcasing\b", 0.7),
+        (r"\bloitering\b", 0.7), (r"\bfollowing (me|people)\b", 0.7),
+    ]),
+    "incident.missing_person": ("Missing person", "high", [
+        (r"\bmissing (person|child|kid|girl|boy|man|woman|senior)\b", 0.95), (r"\bhave you seen\b", 0.7),
+        (r"\b(last seen|went missing)\b", 0.85), (r"\bis missing\b", 0.5),
+    ]),
+    "incident.lost_item": ("Lost item", "low", [
+        (r"\blost (my|a|an|our)\b", 0.85), (r"\bfound (a|an|some)\b", 0.7), (r"\b(wallet|keys|phone|backpack) (is |are |went )?(lost|missing)\b", 0.85),
+        (r"\blost (dog|cat|pet)\b", 0.85),
+    ]),
+    "incident.medical": ("Medical emergency", "high", [
+        (r"\b(ambulance|paramedics?|emt)\b", 0.85), (r"\b(collapsed|unconscious|not breathing|seizure|heart attack|overdose)\b", 0.9),
+        (r"\bmedical (emergency|help)\b", 0.95), (r"\binjured\b", 0.6),
+    ]),
+    "incident.car_accident": ("Car accident", "medium", [
+        (r"\b(car|auto|vehicle|traffic|truck|motorcycle|bike) (accident|crash|collision|wreck)\b", 0.95),
+        (r"\b(crash|collision|wreck|fender[- ]bender|pile[- ]?up)\b", 0.8), (r"\baccident\b", 0.75),
+        (r"\bhit and run\b", 0.9), (r"\brear[- ]ended\b", 0.9),
+    ]),
+    "road.flood": ("Flooded road", "medium", [
+        (r"\bflood(ed|ing|s)?\b", 0.55), (r"\b(under|high|standing) water\b", 0.8),
+        (r"\b(road|street|lane|highway|underpass|intersection)s? (is |are )?flood(ed|ing)\b", 0.9),
+        (r"\bflooded (road|street|lane|highway|underpass|intersection)s?\b", 0.9),
+        (r"\bwater (over|across|on) the road\b", 0.9), (r"\bunderpass\b.*\bwater\b", 0.8),
+    ]),
+    "road.blocked": ("Road blocked", "medium", [
+        (r"\b(road|street|lane|lanes|highway|ramp|exit|bridge) (is |are )?(blocked|closed|shut)\b", 0.9),
+        (r"\b(blocked|closed) (road|street|lane|lanes|highway|ramp|exit)\b", 0.9),
+        (r"\b(downed|fallen) (tree|power line|lines)\b", 0.85), (r"\btraffic jam\b", 0.7),
+        (r"\bdebris\b", 0.65), (r"\bdetour\b", 0.6),
+    ]),
+    "road.construction": ("Road construction", "low", [
+        (r"\bconstruction\b", 0.85), (r"\broad ?work(s)?\b", 0.85), (r"\bwork zone\b", 0.9),
+        (r"\b(repaving|paving|pothole repair)\b", 0.8), (r"\bpothole\b", 0.6),
+    ]),
+    "help.ride": ("Ride needed", "low", [
+        (r"\bneed (a )?ride\b", 0.95), (r"\b(lift|ride) to\b", 0.75), (r"\bcarpool\b", 0.8),
+        (r"\banyone (driving|going) to\b", 0.8),
+    ]),
+    "help.general": ("Help requested", "low", [
+        (r"\bneed help\b", 0.8), (r"\bhelp needed\b", 0.85), (r"\bcan (someone|anyone) help\b", 0.85),
+        (r"\bvolunteers? needed\b", 0.8), (r"\blooking for help\b", 0.8),
+    ]),
+}
+
+_COMPILED = [
+    (cat, label, sev, [(re.compile(p), w) for p, w in pats])
+    for cat, (label, sev, pats) in RULES.items()
+]
+
+# "not", "no", "never" or "n't" up to two words before a match, within one clause
+_NEGATED = re.compile(r"(?:\b(?:not|no|never)|n't)\s+(?:[\w']+\s+){0,2}$")
+
+def _hit(rx: re.Pattern, text: str) -> bool:
+    return any(not _NEGATED.search(text, 0, m.start()) for m in rx.finditer(text))
+
+class LocalMatch(NamedTuple):
+    category: str
+    label: str
+    severity: Optional[str]
+    confidence: float
+
+def classify_local(text: str) -> LocalMatch:
+    """
+    Rule-based classification of normalized (lowercased) text into the
+    CATEGORY_TO_ICON taxonomy. Confidence is the best category's combined match
+    strength, discounted when a second category also matches; negated matches
+    ("not gunshots") do not count. No match gives other.unknown at confidence 0.
+    """
+    scored: List[Tuple[float, str, str, Optional[str]]] = []
+    for cat, label, sev, pats in _COMPILED:
+        miss = 1.0
+        for rx, w in pats:
+            if _hit(rx, text):
+                miss *= 1.0 - w
+        if miss < 1.0:
+            scored.append((1.0 - miss, cat, label, sev))
+    if not scored:
+        return LocalMatch("other.unknown", "Report", None, 0.0)
+    scored.sort(reverse=True)
+    best, cat, label, sev = scored[0]
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+    conf = max(0.0, best - 0.5 * runner_up)
+    return LocalMatch(cat, label, sev, round(conf, 3))
@@ -76,14 +76,58 @@ class Settings(BaseSettings):
     DATA_DIR: Path = Field(default_factory=_default_data_dir)
     REPORTS_DB: Path | None = None
     SESSIONS_DB: Path | None = None
+    REACTIONS_DB: Path | None = None
+    CLASSIFIER_DB: Path | None = None
+    EMBEDDINGS_DB: Path | None = None
     UPLOADS_DIR: Path | None = None
     FRONTEND_DIST: Path = Field(default_factory=_default_frontend_dist)
 
+    # Reports DB writer: writes queued during a commit share the next one; >0 also waits this long for more
+    SQLITE_GROUP_COMMIT_MS: float = 0.0
+    SQLITE_GROUP_COMMIT_MAX: int = 256
+    # Read-only connections (one per thread) serving async handlers' queries off the event loop
+    SQLITE_READ_WORKERS: int = 4
+
     # Defaults
     DEFAULT_RADIUS_KM: float = 40.0
     DEFAULT_LIMIT: int = 10
     MAX_AGE_HOURS: int = 48
 
+    # Hot reaction counters kept in memory (LRU entries)
+    REACTIONS_CACHE_SIZE: int = 10_000
+
+    # Memoized report classifications kept in memory (LRU entries; all are kept on disk)
+    CLASSIFIER_CACHE_SIZE: int = 5_000
+    # Keyword-rule classifications at or above this confidence skip the LLM (> 1 disables them)
+    CLASSIFIER_LOCAL_THRESHOLD: float = 0.8
+
+    # Concurrent async embedding requests are grouped into one API call
+    EMBED_BATCH_MAX: int = 64
+    EMBED_BATCH_WAIT_MS: float = 10.0
+
+    # Semantic search backend: "tidb", "local" (SQLite + on-disk vectors), or "auto" (tidb iff TIDB_URL)
+    VECTOR_BACKEND: str = "auto"
+    # Local index: unfiltered queries use HNSW (if hnswlib is installed) above this many rows
+    VECTOR_ANN_THRESHOLD: int = 50_000
+    # Embed reports missing from the local index in the background at startup
+    VECTOR_SYNC_ON_STARTUP: bool = True
+
+    # Background sync of new reports into the vector store (via the report_outbox table)
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_BATCH: int = 64
+    OUTBOX_POLL_SECONDS: float = 2.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+
+    # Background pollers for upstream hazard feeds (disable for offline dev)
+    FEED_POLL_ENABLED: bool = True
+
+    # Load census tracts (GeoParquet cache + spatial index) in the background at startup
+    TRACTS_WARM_ON_STARTUP: bool = True
+    # Byte budget for serialized /geo/tracts responses (keyed by snapped bbox)
+    TRACTS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Render census-tract vector tiles up to this zoom in the background at startup (0 = off)
+    TRACT_TILES_PRESEED_ZOOM: int = 0
+
     # Optional extras
     firms_map_key: str | None = None
     gdacs_rss_url: str | None = "https://www.gdacs.org/xml/rss.xml"
@@ -95,6 +139,12 @@ class Settings(BaseSettings):
             self.REPORTS_DB = self.DATA_DIR / "pulsemaps_reports.db"
         if self.SESSIONS_DB is None:
             self.SESSIONS_DB = self.DATA_DIR / "pulsemap_sessions.db"
+        if self.REACTIONS_DB is None:
+            self.REACTIONS_DB = self.DATA_DIR / "pulsemap_reactions.db"
+        if self.CLASSIFIER_DB is None:
+            self.CLASSIFIER_DB = self.DATA_DIR / "pulsemap_classifier.db"
+        if self.EMBEDDINGS_DB is None:
+            self.EMBEDDINGS_DB = self.DATA_DIR / "pulsemap_embeddings.db"
         if self.UPLOADS_DIR is None:
             self.UPLOADS_DIR = self.DATA_DIR / "uploads"
 
@@ -105,6 +155,9 @@ class Settings(BaseSettings):
         self.DATA_DIR = self.DATA_DIR.resolve()
         self.REPORTS_DB = self.REPORTS_DB.resolve()
         self.SESSIONS_DB = self.SESSIONS_DB.resolve()
+        self.REACTIONS_DB = self.REACTIONS_DB.resolve()
+        self.CLASSIFIER_DB = self.CLASSIFIER_DB.resolve()
+        self.EMBEDDINGS_DB = self.EMBEDDINGS_DB.resolve()
         self.UPLOADS_DIR = self.UPLOADS_DIR.resolve()
 
 settings = Settings()
@@ -1,13 +1,51 @@
-from math import radians, sin, cos, asin, sqrt
-from typing import Tuple
+from math import radians, sin, cos, asin, sqrt, degrees
+from typing import List, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
 
 def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
     """Distance in km between (lat,lon) points a, b."""
     lat1, lon1 = a
     lat2, lon2 = b
-    R = 6371.0
+    R = EARTH_RADIUS_KM
     dlat = radians(lat2 - lat1)
     dlon = radians(lon2 - lon1)
     lat1r, lat2r = radians(lat1), radians(lat2)
     h = sin(dlat/2)**2 + cos(lat1r)*cos(lat2r)*sin(dlon/2)**2
     return 2 * R * asin(sqrt(h))
+
+def haversine_km_np(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Vectorized haversine: km from (lat, lon) to every point in lats/lons."""
+    lat1r = np.radians(lat)
+    lat2r = np.radians(lats)
+    dlat = lat2r - lat1r
+    dlon = np.radians(lons - lon)
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat1r) * np.cos(lat2r) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+def bbox_around(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) enclosing every point within radius_km of (lat, lon).
+    Falls back to the full longitude range near the poles or across the antimeridian.
+    """
+    dlat = degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    # widest longitude span of the circle (at its poleward edge)
+    ratio = sin(radians(dlat)) / cos(radians(lat))
+    if ratio >= 1.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = degrees(asin(ratio))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180.0 or max_lon > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
+
+def split_antimeridian(bbox: Tuple[float, float, float, float]) -> List[Tuple[float, float, float, float]]:
+    """(min_lon, min_lat, max_lon, max_lat) boxes; a viewport across the antimeridian arrives with min_lon > max_lon."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon > max_lon:
+        return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+    return [bbox]
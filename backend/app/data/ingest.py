@@ -1,28 +1,31 @@
 from datetime import datetime, timezone
-from openai import OpenAI
 from sqlalchemy import text
-from ..db.tidb import ENGINE
-import json
-
-client = OpenAI()  # uses OPENAI_API_KEY
-
-EMBED_MODEL = "text-embedding-3-small"  # 1536-d
+from ..db.tidb import get_engine
+from ..services.embeddings import embed_text, aembed_text
+from .vectors import to_literal, to_literals
+import asyncio, json
 
 def embed(s: str) -> list[float]:
-    out = client.embeddings.create(model=EMBED_MODEL, input=[s])
-    return out.data[0].embedding  # list[float]
+    return embed_text(s).tolist()  # cached by (model, sha256(text))
 
 def insert_report(lat: float, lon: float, text_msg: str, props: dict | None = None):
-    emb = embed(text_msg or "User report")
+    _insert(lat, lon, text_msg, props, embed_text(text_msg or "User report"))
+
+async def ainsert_report(lat: float, lon: float, text_msg: str, props: dict | None = None):
+    # concurrent callers share one embeddings call via the micro-batcher
+    emb = await aembed_text(text_msg or "User report")
+    await asyncio.to_thread(_insert, lat, lon, text_msg, props, emb)
+
+def _insert(lat: float, lon: float, text_msg: str, props: dict | None, emb):
     created_at = datetime.now(timezone.utc).isoformat()
     props = props or {}
-    vec_literal = "[" + ",".join(f"{x:.7f}" for x in emb) + "]"  # TiDB accepts '[...]'
+    vec_literal = to_literal(emb)  # TiDB accepts '[...]'
 
     sql = text("""
         INSERT INTO reports (lat, lon, text, props, created_at, embedding)
         VALUES (:lat, :lon, :text, CAST(:props AS JSON), :created_at, :emb)
     """)
-    with ENGINE.begin() as cx:
+    with get_engine().begin() as cx:
         cx.execute(sql, {
             "lat": float(lat),
             "lon": float(lon),
@@ -31,3 +34,24 @@ def insert_report(lat: float, lon: float, text_msg: str, props: dict | None = No
             "created_at": created_at,
             "emb": vec_literal,
         })
+
+def upsert_reports(rows, embs) -> None:
+    """
+    Write SQLite reports (id, lat, lon, text, props_json, created_at) with their
+    embeddings under the same ids; re-running a batch is harmless.
+    """
+    sql = text("""
+        INSERT INTO reports (id, lat, lon, text, props, created_at, embedding)
+        VALUES (:id, :lat, :lon, :text, CAST(:props AS JSON), :created_at, :emb)
+        ON DUPLICATE KEY UPDATE
+          lat=VALUES(lat), lon=VALUES(lon), text=VALUES(text),
+          props=VALUES(props), created_at=VALUES(created_at),
+          embedding=VALUES(embedding)
+    """)
+    values = [
+        {"id": int(rid), "lat": float(lat), "lon": float(lon), "text": txt or "",
+         "props": props_json or "{}", "created_at": created_at, "emb": lit}
+        for (rid, lat, lon, txt, props_json, created_at), lit in zip(rows, to_literals(embs))
+    ]
+    with get_engine().begin() as cx:
+        cx.execute(sql, values)
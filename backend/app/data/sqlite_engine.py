@@ -0,0 +1,167 @@
+# backend/app/data/sqlite_engine.py
+from __future__ import annotations
+import asyncio, functools, queue, sqlite3, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+WriteFn = Callable[[sqlite3.Connection], Any]
+
+BUSY_TIMEOUT_MS = 5000
+
+def connect(path: Path, read_only: bool = False, synchronous: str = "NORMAL") -> sqlite3.Connection:
+    """
+    A connection in WAL mode. With synchronous=NORMAL commits append to the WAL
+    without an fsync each (the WAL is synced at checkpoints), which stays
+    corruption-safe and only risks the last commits on power loss.
+    """
+    if read_only:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    return conn
+
+class SQLiteEngine:
+    """
+    One database file, one writer thread, a read connection per thread.
+      write(fn)  - fn(conn) runs on the writer thread; the caller blocks until its
+                   batch commits and gets fn's return value (or its exception)
+      reader()   - this thread's read-only connection (WAL readers never block the writer)
+      read(fn)   - await fn(...) on a dedicated pool of read_workers threads, i.e. a
+                   pool of that many read-only connections, off the event loop
+    The writer group-commits: every job queued while the previous commit ran (up
+    to group_max, optionally waiting group_ms for more) goes into one transaction,
+    each under its own SAVEPOINT so a failing job rolls back alone. Under load one
+    commit covers many writes; a lone write is not delayed unless group_ms > 0.
+    """
+
+    def __init__(self, path: Path, group_ms: float = 0.0, group_max: int = 256,
+                 synchronous: str = "NORMAL", read_workers: int = 4) -> None:
+        self.path = path
+        self.synchronous = synchronous
+        self.read_workers = max(1, read_workers)
+        self._read_pool: Optional[ThreadPoolExecutor] = None
+        self.group_s = group_ms / 1000.0
+        self.group_max = max(1, group_max)
+        self._jobs: "queue.Queue[Optional[Tuple[WriteFn, Future]]]" = queue.Queue()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._wconn: Optional[sqlite3.Connection] = None
+        self.commits = 0
+        self.writes = 0
+
+    # ---- writes ----
+    def write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        if threading.current_thread() is self._writer:
+            return fn(self._wconn)  # nested write from inside a job: already in the transaction
+        return self.submit(fn).result()
+
+    def submit(self, fn: WriteFn) -> Future:
+        """Queue fn without waiting; the Future resolves once its batch has committed."""
+        self._ensure_writer()
+        fut: Future = Future()
+        self._jobs.put((fn, fut))
+        return fut
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._wconn = connect(self.path, synchronous=self.synchronous)
+                self._writer = threading.Thread(target=self._run, name=f"sqlite-writer:{self.path.name}", daemon=True)
+                self._writer.start()
+
+    def _run(self) -> None:
+        conn = self._wconn
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            batch = [job]
+            deadline = time.monotonic() + self.group_s
+            stop = False
+            # everything queued while the last batch committed joins this one; with
+            # group_ms > 0 the writer also waits that long for stragglers
+            while len(batch) < self.group_max:
+                try:
+                    wait = deadline - time.monotonic()
+                    job = self._jobs.get(timeout=wait) if wait > 0 else self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+            self._commit(conn, batch)
+            if stop:
+                return
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[Tuple[WriteFn, Future]]) -> None:
+        results: List[Tuple[Future, bool, Any]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, fut in batch:
+                conn.execute("SAVEPOINT job")
+                try:
+                    res = fn(conn)
+                    conn.execute("RELEASE job")
+                    results.append((fut, True, res))
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    results.append((fut, False, e))
+            conn.execute("COMMIT")
+        except BaseException as e:  # BEGIN/COMMIT itself failed: nothing in the batch was written
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results = [(fut, False, e) for _, fut in batch]
+        self.commits += 1
+        self.writes += len(batch)
+        for fut, ok, val in results:
+            if ok:
+                fut.set_result(val)
+            else:
+                fut.set_exception(val)
+
+    # ---- reads ----
+    def reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path, read_only=True)
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    async def read(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._read_pool is None:
+            with self._readers_lock:
+                if self._read_pool is None:
+                    self._read_pool = ThreadPoolExecutor(self.read_workers, thread_name_prefix=f"sqlite-read:{self.path.name}")
+        return await asyncio.get_running_loop().run_in_executor(
+            self._read_pool, functools.partial(fn, *args, **kwargs)
+        )
+
+    def close(self) -> None:
+        if self._read_pool is not None:
+            self._read_pool.shutdown(wait=True)
+            self._read_pool = None
+        if self._writer is not None and self._writer.is_alive():
+            self._jobs.put(None)
+            self._writer.join()
+        with self._readers_lock:
+            for c in self._readers:
+                c.close()
+            self._readers.clear()
+        self._local = threading.local()
+
+    def stats(self) -> dict:
+        return {"commits": self.commits, "writes": self.writes,
+                "avg_group": round(self.writes / self.commits, 2) if self.commits else 0.0}
@@ -2,11 +2,12 @@
 from __future__ import annotations
 import json, sqlite3
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 from ..config.settings import settings
-from .geo import haversine_km
+from .geo import haversine_km, bbox_around
+from .sqlite_engine import SQLiteEngine, connect
 
 DB_PATH: Path = settings.REPORTS_DB
 # Ensure parent exists & fail early if unwritable
@@ -16,8 +17,16 @@ try:
 except Exception as e:
     raise RuntimeError(f"Cannot create DB file at {DB_PATH}: {e}")
 
-_CONN = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-_CONN.execute("""
+# Writes go through ENGINE's single group-committing writer; reads use per-thread connections
+ENGINE = SQLiteEngine(DB_PATH, group_ms=settings.SQLITE_GROUP_COMMIT_MS, group_max=settings.SQLITE_GROUP_COMMIT_MAX,
+                      read_workers=settings.SQLITE_READ_WORKERS)
+
+def _read() -> sqlite3.Connection:
+    return ENGINE.reader()
+
+# Schema setup / in-place migrations, before any reader or the writer starts
+_cx = connect(DB_PATH)
+_cx.execute("""
 CREATE TABLE IF NOT EXISTS reports (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   lat REAL NOT NULL,
@@ -27,7 +36,88 @@ CREATE TABLE IF NOT EXISTS reports (
   created_at TEXT NOT NULL
 )
 """)
-_CONN.commit()
+# R*Tree over report points (min == max per axis); the rowid matches reports.id
+_cx.execute("""
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_rtree USING rtree(
+  id, min_lat, max_lat, min_lon, max_lon
+)
+""")
+# Indexed epoch-seconds copy of created_at for recency queries (added to older DBs in place)
+if "created_ts" not in {row[1] for row in _cx.execute("PRAGMA table_info(reports)")}:
+    _cx.execute("ALTER TABLE reports ADD COLUMN created_ts INTEGER")
+_cx.execute(
+    "UPDATE reports SET created_ts = CAST(strftime('%s', created_at) AS INTEGER) WHERE created_ts IS NULL"
+)
+_cx.execute("CREATE INDEX IF NOT EXISTS idx_reports_created_ts ON reports(created_ts)")
+# Census tract each report falls in, plus per-tract rollups kept current on insert
+if "geoid" not in {row[1] for row in _cx.execute("PRAGMA table_info(reports)")}:
+    _cx.execute("ALTER TABLE reports ADD COLUMN geoid TEXT")
+_cx.execute("CREATE INDEX IF NOT EXISTS idx_reports_geoid ON reports(geoid)")
+# Taxonomy category (copied out of props) for filtered semantic search
+if "category" not in {row[1] for row in _cx.execute("PRAGMA table_info(reports)")}:
+    _cx.execute("ALTER TABLE reports ADD COLUMN category TEXT")
+    _cx.execute(
+        "UPDATE reports SET category = json_extract(props_json, '$.category') "
+        "WHERE json_valid(props_json)"
+    )
+_cx.execute("CREATE INDEX IF NOT EXISTS idx_reports_category ON reports(category, created_ts)")
+# Transactional outbox: one row per new report, written with it, drained by
+# services/outbox.py into the vector store (state: pending | done | dead)
+_cx.execute("""
+CREATE TABLE IF NOT EXISTS report_outbox (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  report_id INTEGER NOT NULL,
+  state TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_ts INTEGER NOT NULL DEFAULT 0,
+  last_error TEXT,
+  updated_ts INTEGER
+)
+""")
+_cx.execute("CREATE INDEX IF NOT EXISTS idx_report_outbox_due ON report_outbox(state, next_ts)")
+_cx.execute("""
+CREATE TABLE IF NOT EXISTS tract_stats (
+  geoid TEXT PRIMARY KEY,
+  report_count INTEGER NOT NULL DEFAULT 0,
+  sev_low INTEGER NOT NULL DEFAULT 0,
+  sev_medium INTEGER NOT NULL DEFAULT 0,
+  sev_high INTEGER NOT NULL DEFAULT 0,
+  max_severity INTEGER NOT NULL DEFAULT 0,
+  last_report_ts INTEGER
+)
+""")
+_cx.close()
+
+SEVERITY_RANK = {"low": 1, "medium": 2, "high": 3}
+SEVERITY_NAME = {v: k for k, v in SEVERITY_RANK.items()}
+
+def _severity_rank(sev: Any) -> int:
+    return SEVERITY_RANK.get(str(sev or "").strip().lower(), 0)
+
+def _bump_tract_stats(cx: sqlite3.Connection, geoid: str, severity: Any, ts: int) -> None:
+    """Fold one new report into tract_stats (runs inside the caller's write)."""
+    rank = _severity_rank(severity)
+    cx.execute("""
+        INSERT INTO tract_stats (geoid, report_count, sev_low, sev_medium, sev_high, max_severity, last_report_ts)
+        VALUES (?, 1, ?, ?, ?, ?, ?)
+        ON CONFLICT(geoid) DO UPDATE SET
+          report_count = report_count + 1,
+          sev_low = sev_low + excluded.sev_low,
+          sev_medium = sev_medium + excluded.sev_medium,
+          sev_high = sev_high + excluded.sev_high,
+          max_severity = MAX(max_severity, excluded.max_severity),
+          last_report_ts = MAX(COALESCE(last_report_ts, 0), excluded.last_report_ts)
+    """, (geoid, int(rank == 1), int(rank == 2), int(rank == 3), rank, ts))
+
+def _sync_spatial_index() -> int:
+    """Index any reports rows missing from the R*Tree (pre-existing DBs, bulk loads)."""
+    return ENGINE.write(lambda cx: cx.execute("""
+        INSERT INTO reports_rtree (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT r.id, r.lat, r.lat, r.lon, r.lon FROM reports r
+        WHERE NOT EXISTS (SELECT 1 FROM reports_rtree t WHERE t.id = r.id)
+    """).rowcount)
+
+_sync_spatial_index()
 
 def _row_to_feature(row: tuple) -> Dict[str, Any]:
     _id, lat, lon, text, props_json, created_at = row
@@ -45,16 +135,34 @@ def _row_to_feature(row: tuple) -> Dict[str, Any]:
         "properties": props,
     }
 
-def add_report(lat: float, lon: float, text: str = "User report", props: dict | None = None):
-    created_at = datetime.now(timezone.utc).isoformat()
+def add_report(
+    lat: float,
+    lon: float,
+    text: str = "User report",
+    props: dict | None = None,
+    geoid: str | None = None,
+):
+    now = datetime.now(timezone.utc)
+    created_at = now.isoformat()
+    created_ts = int(now.timestamp())
     props = dict(props or {})
     props_json = json.dumps(props)
-    cur = _CONN.execute(
-        "INSERT INTO reports (lat, lon, text, props_json, created_at) VALUES (?,?,?,?,?)",
-        (float(lat), float(lon), text, props_json, created_at)
-    )
-    _CONN.commit()
-    rid = str(cur.lastrowid)
+
+    def write(cx: sqlite3.Connection) -> int:
+        cur = cx.execute(
+            "INSERT INTO reports (lat, lon, text, props_json, created_at, created_ts, geoid, category) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            (float(lat), float(lon), text, props_json, created_at, created_ts, geoid, props.get("category"))
+        )
+        cx.execute(
+            "INSERT INTO reports_rtree (id, min_lat, max_lat, min_lon, max_lon) VALUES (?,?,?,?,?)",
+            (cur.lastrowid, float(lat), float(lat), float(lon), float(lon))
+        )
+        if geoid:
+            _bump_tract_stats(cx, geoid, props.get("severity"), created_ts)
+        cx.execute("INSERT INTO report_outbox (report_id, updated_ts) VALUES (?, ?)", (cur.lastrowid, created_ts))
+        return cur.lastrowid
+    rid = str(ENGINE.write(write))
 
     out_props = {"type": "user_report", "text": text, "reported_at": created_at, **props}
     out_props.setdefault("rid", rid)
@@ -66,10 +174,85 @@ def add_report(lat: float, lon: float, text: str = "User report", props: dict |
         "properties": out_props,
     }
 
-def get_feature_collection() -> Dict[str, Any]:
-    cur = _CONN.execute("SELECT id, lat, lon, text, props_json, created_at FROM reports ORDER BY id DESC")
-    feats = [_row_to_feature(r) for r in cur.fetchall()]
-    return {"type": "FeatureCollection", "features": feats}
+BBox = Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+
+def _where_bbox(bbox: BBox, where: list[str], params: list[Any]) -> None:
+    """rtree condition (alias t) for bbox; minLon > maxLon means it crosses the antimeridian."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon <= max_lon:
+        where.append("t.min_lat <= ? AND t.max_lat >= ? AND t.min_lon <= ? AND t.max_lon >= ?")
+        params += [max_lat, min_lat, max_lon, min_lon]
+    else:
+        where.append("t.min_lat <= ? AND t.max_lat >= ? AND (t.max_lon >= ? OR t.min_lon <= ?)")
+        params += [max_lat, min_lat, min_lon, max_lon]
+
+def _reports_query(
+    after_id: Optional[int], limit: Optional[int], bbox: Optional[BBox]
+) -> Tuple[str, list[Any]]:
+    """Newest-first keyset page: rows with id < after_id, optionally inside bbox."""
+    sql = "SELECT r.id, r.lat, r.lon, r.text, r.props_json, r.created_at FROM reports r"
+    where: list[str] = []
+    params: list[Any] = []
+    if bbox is not None:
+        sql += " JOIN reports_rtree t ON t.id = r.id"
+        _where_bbox(bbox, where, params)
+    if after_id is not None:
+        where.append("r.id < ?")
+        params.append(int(after_id))
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY r.id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+def iter_reports(
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    bbox: Optional[BBox] = None,
+    batch: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream report Features straight off a cursor, `batch` rows at a time.
+    Uses its own connection: the stream may hop threads between batches.
+    """
+    sql, params = _reports_query(after_id, limit, bbox)
+    conn = connect(DB_PATH, read_only=True)
+    try:
+        cur = conn.execute(sql, params)
+        while rows := cur.fetchmany(batch):
+            for r in rows:
+                yield _row_to_feature(r)
+    finally:
+        conn.close()
+
+def get_feature_collection(
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    bbox: Optional[BBox] = None,
+) -> Dict[str, Any]:
+    sql, params = _reports_query(after_id, limit, bbox)
+    rows = _read().execute(sql, params).fetchall()
+    fc: Dict[str, Any] = {"type": "FeatureCollection", "features": [_row_to_feature(r) for r in rows]}
+    if limit is not None:
+        # keyset cursor for the next page; None once the last page is reached
+        fc["next_after_id"] = rows[-1][0] if len(rows) == int(limit) else None
+    return fc
+
+def _cutoff_ts(max_age_hours: int) -> int:
+    return int((datetime.now(timezone.utc) - timedelta(hours=int(max_age_hours))).timestamp())
+
+def recent_reports(limit: int, max_age_hours: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Newest `limit` reports (optionally within max_age_hours), read off idx_reports_created_ts."""
+    sql = "SELECT id, lat, lon, text, props_json, created_at FROM reports"
+    params: list[Any] = []
+    if max_age_hours is not None:
+        sql += " WHERE created_ts >= ?"
+        params.append(_cutoff_ts(max_age_hours))
+    sql += " ORDER BY created_ts DESC, id DESC LIMIT ?"
+    params.append(max(0, int(limit)))
+    return [_row_to_feature(r) for r in _read().execute(sql, params)]
 
 def find_reports_near(
     lat: float,
@@ -78,27 +261,197 @@ def find_reports_near(
     limit: int = 20,
     max_age_hours: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    params: list[Any] = []
-    sql = "SELECT id, lat, lon, text, props_json, created_at FROM reports"
+    min_lat, max_lat, min_lon, max_lon = bbox_around(lat, lon, radius_km)
+    params: list[Any] = [max_lat, min_lat, max_lon, min_lon]
+    sql = """
+        SELECT r.id, r.lat, r.lon, r.text, r.props_json, r.created_at
+        FROM reports_rtree t JOIN reports r ON r.id = t.id
+        WHERE t.min_lat <= ? AND t.max_lat >= ? AND t.min_lon <= ? AND t.max_lon >= ?
+    """
     if max_age_hours is not None:
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=int(max_age_hours))
-        sql += " WHERE datetime(created_at) >= datetime(?)"
-        params.append(cutoff.isoformat())
-    sql += " ORDER BY id DESC LIMIT 2000"
-    cur = _CONN.execute(sql, params)
+        sql += " AND r.created_ts >= ?"
+        params.append(_cutoff_ts(max_age_hours))
+    cur = _read().execute(sql, params)
 
+    # Exact distance only for rows that survived the bounding-box prefilter
     center = (lat, lon)
     cand = []
-    for r in cur.fetchall():
-        _, lat2, lon2, *_ = r
-        d = haversine_km(center, (lat2, lon2))
+    for r in cur:
+        d = haversine_km(center, (r[1], r[2]))
         if d <= radius_km:
             cand.append((d, r))
     cand.sort(key=lambda x: x[0])
     out = [_row_to_feature(r) for _, r in cand[:max(1, limit)]]
     return out
 
+def filter_reports(
+    bbox: Optional[BBox] = None,
+    since_ts: Optional[int] = None,
+    category: Optional[str] = None,
+) -> List[Tuple[int, float, float]]:
+    """(id, lat, lon) of reports matching every given filter, via the rtree / created_ts / category indexes."""
+    sql = "SELECT r.id, r.lat, r.lon FROM reports r"
+    where: list[str] = []
+    params: list[Any] = []
+    if bbox is not None:
+        sql += " JOIN reports_rtree t ON t.id = r.id"
+        _where_bbox(bbox, where, params)
+    if since_ts is not None:
+        where.append("r.created_ts >= ?")
+        params.append(int(since_ts))
+    if category:
+        where.append("r.category = ?")
+        params.append(category)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return _read().execute(sql, params).fetchall()
+
+def reports_by_ids(ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    out: Dict[int, Dict[str, Any]] = {}
+    for i in range(0, len(ids), 900):
+        chunk = [int(x) for x in ids[i:i + 900]]
+        for r in _read().execute(
+            "SELECT id, lat, lon, text, props_json, created_at FROM reports "
+            f"WHERE id IN ({','.join('?' * len(chunk))})", chunk,
+        ):
+            out[r[0]] = _row_to_feature(r)
+    return out
+
+def report_texts(after_id: int = 0, limit: int = 1000) -> List[Tuple[int, str]]:
+    """(id, text) in id order after after_id; for (re)building embedding indexes."""
+    return _read().execute(
+        "SELECT id, text FROM reports WHERE id > ? ORDER BY id LIMIT ?", (int(after_id), int(limit))
+    ).fetchall()
+
+def outbox_due(limit: int, now_ts: int) -> List[Tuple[int, int, float, float, str, str, str]]:
+    """Pending outbox entries due by now_ts, oldest first, joined with their reports:
+    (outbox_id, report_id, lat, lon, text, props_json, created_at)."""
+    return _read().execute("""
+        SELECT o.id, r.id, r.lat, r.lon, r.text, r.props_json, r.created_at
+        FROM report_outbox o JOIN reports r ON r.id = o.report_id
+        WHERE o.state = 'pending' AND o.next_ts <= ?
+        ORDER BY o.id LIMIT ?
+    """, (int(now_ts), int(limit))).fetchall()
+
+def outbox_done(ids: List[int]) -> None:
+    now = int(datetime.now(timezone.utc).timestamp())
+    ENGINE.write(lambda cx: cx.executemany(
+        "UPDATE report_outbox SET state = 'done', updated_ts = ?, last_error = NULL WHERE id = ?",
+        [(now, int(i)) for i in ids],
+    ))
+
+def outbox_failed(ids: List[int], error: str, max_attempts: int, base_s: int, cap_s: int) -> None:
+    """Count a failed attempt: retry after base_s * 2^(attempts-1) (capped), or mark 'dead' at max_attempts."""
+    now = int(datetime.now(timezone.utc).timestamp())
+    # one UPDATE per id (right-hand sides see the old attempts); ids whose row was
+    # deleted meanwhile, e.g. by clear_reports(), match nothing
+    ENGINE.write(lambda cx: cx.executemany("""
+        UPDATE report_outbox SET
+          state = CASE WHEN attempts + 1 >= ? THEN 'dead' ELSE 'pending' END,
+          next_ts = ? + MIN(?, ? << MIN(attempts, 30)),
+          attempts = attempts + 1, last_error = ?, updated_ts = ?
+        WHERE id = ?
+    """, [(int(max_attempts), now, int(cap_s), int(base_s), error[:500], now, int(i)) for i in ids]))
+
+def outbox_retry_dead() -> int:
+    """Put dead-lettered entries back in the queue with a fresh attempt budget."""
+    return ENGINE.write(lambda cx: cx.execute(
+        "UPDATE report_outbox SET state = 'pending', attempts = 0, next_ts = 0 WHERE state = 'dead'"
+    ).rowcount)
+
+def outbox_purge_done(before_ts: int) -> int:
+    return ENGINE.write(lambda cx: cx.execute(
+        "DELETE FROM report_outbox WHERE state = 'done' AND updated_ts < ?", (int(before_ts),)
+    ).rowcount)
+
+def outbox_counts() -> Dict[str, int]:
+    return dict(_read().execute("SELECT state, COUNT(*) FROM report_outbox GROUP BY state").fetchall())
+
+def report_locations(rids: List[str]) -> Dict[str, Tuple[float, float]]:
+    """(lat, lon) for each existing report id; unknown or non-numeric ids are skipped."""
+    ids = [int(r) for r in rids if str(r).isdigit()]
+    out: Dict[str, Tuple[float, float]] = {}
+    for i in range(0, len(ids), 900):
+        chunk = ids[i:i + 900]
+        for rid, lat, lon in _read().execute(
+            f"SELECT id, lat, lon FROM reports WHERE id IN ({','.join('?' * len(chunk))})", chunk
+        ):
+            out[str(rid)] = (lat, lon)
+    return out
+
+def reports_missing_geoid(limit: int = 5000) -> List[Tuple[int, float, float]]:
+    """(id, lat, lon) of reports not yet assigned to a tract."""
+    return _read().execute(
+        "SELECT id, lat, lon FROM reports WHERE geoid IS NULL ORDER BY id LIMIT ?", (int(limit),)
+    ).fetchall()
+
+def assign_geoids(pairs: List[Tuple[int, Optional[str]]]) -> None:
+    """
+    Backfill tracts for existing reports and fold them into tract_stats.
+    Reports outside every tract get '' so they are not retried.
+    """
+    def write(cx: sqlite3.Connection) -> None:
+        for rid, geoid in pairs:
+            # a report is counted once even if two backfills race over it
+            if not cx.execute(
+                "UPDATE reports SET geoid = ? WHERE id = ? AND geoid IS NULL", (geoid or "", int(rid))
+            ).rowcount:
+                continue
+            if geoid:
+                sev, ts = cx.execute(
+                    "SELECT json_extract(props_json, '$.severity'), created_ts FROM reports WHERE id = ?",
+                    (int(rid),),
+                ).fetchone()
+                _bump_tract_stats(cx, geoid, sev, ts or 0)
+    ENGINE.write(write)
+
+def get_tract_stats(geoids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-tract report rollups keyed by GEOID (tracts without reports are omitted)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    geoids = [g for g in geoids if g]
+    for i in range(0, len(geoids), 900):  # stay under SQLite's bound-parameter limit
+        chunk = geoids[i:i + 900]
+        rows = _read().execute(
+            "SELECT geoid, report_count, sev_low, sev_medium, sev_high, max_severity, last_report_ts "
+            f"FROM tract_stats WHERE geoid IN ({','.join('?' * len(chunk))})",
+            chunk,
+        )
+        for geoid, n, low, med, high, max_sev, last_ts in rows:
+            out[geoid] = {
+                "report_count": n, "sev_low": low, "sev_medium": med, "sev_high": high,
+                "max_severity": SEVERITY_NAME.get(max_sev), "last_report_ts": last_ts,
+            }
+    return out
+
 def clear_reports() -> dict[str, Any]:
-    _CONN.execute("DELETE FROM reports")
-    _CONN.commit()
+    def write(cx: sqlite3.Connection) -> None:
+        cx.execute("DELETE FROM reports")
+        cx.execute("DELETE FROM reports_rtree")
+        cx.execute("DELETE FROM tract_stats")
+        cx.execute("DELETE FROM report_outbox")
+    ENGINE.write(write)
     return {"ok": True, "message": "All reports cleared."}
+
+# ---- async reads for event-loop callers (run on ENGINE's read pool) ----
+
+async def aget_feature_collection(
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    bbox: Optional[BBox] = None,
+) -> Dict[str, Any]:
+    return await ENGINE.read(get_feature_collection, after_id, limit, bbox)
+
+async def arecent_reports(limit: int, max_age_hours: Optional[int] = None) -> List[Dict[str, Any]]:
+    return await ENGINE.read(recent_reports, limit, max_age_hours)
+
+async def afind_reports_near(
+    lat: float,
+    lon: float,
+    radius_km: float = 10.0,
+    limit: int = 20,
+    max_age_hours: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    return await ENGINE.read(find_reports_near, lat, lon, radius_km, limit, max_age_hours)
+
+async def areport_locations(rids: List[str]) -> Dict[str, Tuple[float, float]]:
+    return await ENGINE.read(report_locations, rids)
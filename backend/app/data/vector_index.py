@@ -0,0 +1,199 @@
+# backend/app/data/vector_index.py
+from __future__ import annotations
+import importlib.util, json, logging, os, threading
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+GROW_ROWS = 4096  # minimum capacity step for the matrix files
+
+class LocalVectorIndex:
+    """
+    Append-only on-disk k-NN index for report embeddings.
+      <name>.f32   memory-mapped (capacity, dim) float32 matrix of unit vectors
+      <name>.ids   memory-mapped int64 report id per row
+      <name>.json  {"dim", "count"}; rows past count are unused capacity
+    Cosine distance is 1 - dot on the normalized rows. Queries scan the matrix with
+    NumPy; over `ann_threshold` rows an HNSW graph (hnswlib, if installed) is used
+    for unfiltered top-k, kept in <name>.hnsw and extended as rows are appended.
+    """
+
+    def __init__(self, base: Path, dim: int, ann_threshold: int = 50_000) -> None:
+        self.base = base
+        self.dim = dim
+        self.ann_threshold = ann_threshold
+        self._lock = threading.RLock()
+        self._count = 0
+        self._vecs: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._order: Optional[np.ndarray] = None  # argsort of ids[:count], rebuilt lazily
+        self._hnsw = None
+        base.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+
+    # ---- storage ----
+    def _path(self, ext: str) -> Path:
+        return self.base.with_suffix(ext)
+
+    def _open(self) -> None:
+        meta = self._path(".json")
+        if meta.exists():
+            m = json.loads(meta.read_text())
+            if m.get("dim") != self.dim:
+                log.warning("vector index %s has dim %s, expected %s; starting empty", self.base, m.get("dim"), self.dim)
+            else:
+                self._count = int(m["count"])
+        for ext in (".f32", ".ids"):
+            self._path(ext).touch(exist_ok=True)
+        self._map(max(self._capacity_on_disk(), self._count))
+
+    def _capacity_on_disk(self) -> int:
+        return min(os.path.getsize(self._path(".f32")) // (4 * self.dim), os.path.getsize(self._path(".ids")) // 8)
+
+    def _map(self, capacity: int) -> None:
+        for ext, width in ((".f32", 4 * self.dim), (".ids", 8)):
+            p = self._path(ext)
+            if os.path.getsize(p) < capacity * width:
+                with open(p, "r+b") as f:
+                    f.truncate(capacity * width)
+        vecs = ids = None
+        if capacity:
+            vecs = np.memmap(self._path(".f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            ids = np.memmap(self._path(".ids"), dtype=np.int64, mode="r+", shape=(capacity,))
+        # swapped together; readers holding the old maps keep valid views of rows < count
+        self._vecs, self._ids = vecs, ids
+
+    def _write_meta(self) -> None:
+        tmp = self._path(".json.tmp")
+        tmp.write_text(json.dumps({"dim": self.dim, "count": self._count}))
+        os.replace(tmp, self._path(".json"))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, ids: Sequence[int], vecs: np.ndarray) -> int:
+        """Append rows for ids not indexed yet; returns how many were added."""
+        vecs = np.asarray(vecs, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            ids_arr = np.asarray(ids, dtype=np.int64)
+            keep = self.lookup(ids_arr) < 0
+            ids_arr, vecs = ids_arr[keep], vecs[keep]
+            ids_arr, first = np.unique(ids_arr, return_index=True)
+            vecs = vecs[first]
+            n = len(ids_arr)
+            if not n:
+                return 0
+            norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+            vecs = vecs / np.where(norms == 0, 1.0, norms)
+            start, end = self._count, self._count + n
+            cap = 0 if self._vecs is None else self._vecs.shape[0]
+            if end > cap:
+                self._map(max(end, cap * 2, GROW_ROWS))
+            self._vecs[start:end] = vecs
+            self._ids[start:end] = ids_arr
+            self._vecs.flush()
+            self._ids.flush()
+            self._count = end
+            self._write_meta()
+            self._order = None
+            if self._hnsw is not None:
+                self._extend_hnsw(persist=False)
+            return n
+
+    def lookup(self, ids: np.ndarray) -> np.ndarray:
+        """Row of each id, -1 where not indexed."""
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            n = self._count
+            if not n or not len(ids):
+                return np.full(len(ids), -1, dtype=np.int64)
+            if self._order is None:
+                self._order = np.argsort(self._ids[:n], kind="stable")
+            order, known = self._order, self._ids[:n]
+        sorted_ids = known[order]
+        pos = np.searchsorted(sorted_ids, ids)
+        pos_c = np.minimum(pos, n - 1)
+        hit = sorted_ids[pos_c] == ids
+        return np.where(hit, order[pos_c], -1)
+
+    def indexed_ids(self) -> np.ndarray:
+        with self._lock:
+            return np.array(self._ids[:self._count]) if self._count else np.zeros(0, dtype=np.int64)
+
+    # ---- queries ----
+    def distances(self, q: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Cosine distance from q to the given rows (exact)."""
+        qn = self._unit(q)
+        if not len(rows):
+            return np.zeros(0, dtype=np.float64)
+        with self._lock:
+            vecs = self._vecs  # rows come from lookup(), so they are < count of this map
+        return 1.0 - (vecs[rows] @ qn).astype(np.float64)
+
+    def top(self, q: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, cosine distances) of the n nearest rows overall, nearest first."""
+        qn = self._unit(q)
+        with self._lock:
+            count, vecs, ids = self._count, self._vecs, self._ids
+            if not count:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+            n = min(n, count)
+            if count > self.ann_threshold and self._ensure_hnsw():
+                # hnswlib does not allow queries concurrent with add_items/resize_index
+                self._hnsw.set_ef(max(64, 2 * n))
+                labels, dist = self._hnsw.knn_query(qn, k=n)
+                rows = labels[0].astype(np.int64)
+                return np.asarray(ids[rows]), dist[0].astype(np.float64)
+        # brute force on the snapshot: appends only write rows >= count
+        d = 1.0 - (vecs[:count] @ qn).astype(np.float64)
+        part = np.argpartition(d, n - 1)[:n] if n < count else np.arange(count)
+        part = part[np.lexsort((ids[part], d[part]))]
+        return np.asarray(ids[part]), d[part]
+
+    def _unit(self, q: np.ndarray) -> np.ndarray:
+        q = np.asarray(q, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    # ---- optional HNSW ----
+    def _ensure_hnsw(self) -> bool:
+        if self._hnsw is not None:
+            return True
+        if importlib.util.find_spec("hnswlib") is None:
+            return False
+        import hnswlib
+        idx = hnswlib.Index(space="ip", dim=self.dim)
+        path = self._path(".hnsw")
+        if path.exists():
+            try:
+                idx.load_index(str(path), max_elements=max(self._count, 1))
+            except Exception as e:
+                log.warning("rebuilding HNSW index (%r)", e)
+                idx = hnswlib.Index(space="ip", dim=self.dim)
+                idx.init_index(max_elements=max(self._count, 1), ef_construction=200, M=16)
+        else:
+            idx.init_index(max_elements=max(self._count, 1), ef_construction=200, M=16)
+        self._hnsw = idx
+        self._extend_hnsw(persist=True)
+        return True
+
+    def _extend_hnsw(self, persist: bool) -> None:
+        """Insert rows the graph has not seen yet (labels are row numbers)."""
+        idx = self._hnsw
+        have = idx.get_current_count()
+        if have >= self._count:
+            return
+        if idx.get_max_elements() < self._count:
+            idx.resize_index(max(self._count, 2 * idx.get_max_elements()))
+        idx.add_items(np.asarray(self._vecs[have:self._count]), np.arange(have, self._count))
+        if persist:
+            idx.save_index(str(self._path(".hnsw")))
+
+    def save(self) -> None:
+        """Persist the HNSW graph (rows appended since the last save are re-added on load otherwise)."""
+        with self._lock:
+            if self._hnsw is not None:
+                self._hnsw.save_index(str(self._path(".hnsw")))
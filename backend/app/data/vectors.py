@@ -0,0 +1,48 @@
+# backend/app/data/vectors.py
+from __future__ import annotations
+from functools import lru_cache
+from typing import List, Sequence, Union
+
+import numpy as np
+
+VectorLike = Union[np.ndarray, Sequence[float]]
+
+SCALE = 10_000_000  # 7 decimal places, same resolution as the old f"{x:.7f}" literals
+
+def as_matrix(vecs: Union[VectorLike, Sequence[VectorLike]]) -> np.ndarray:
+    """C-contiguous float32 2-D array (one vector per row)."""
+    m = np.ascontiguousarray(vecs, dtype=np.float32)
+    return m.reshape(1, -1) if m.ndim == 1 else m
+
+@lru_cache(maxsize=8)
+def _template(dim: int) -> str:
+    return "[" + ",".join(["%de-7"] * dim) + "]"
+
+def to_literals(vecs: Union[VectorLike, Sequence[VectorLike]]) -> List[str]:
+    """
+    TiDB/JSON vector literals for each row, e.g. "[-132993e-7,25282e-7,...]".
+    Values are scaled to integers in one NumPy pass and each row is rendered by a
+    single %-format, so there is no per-element Python work.
+    """
+    m = as_matrix(vecs)
+    if not np.isfinite(m).all():
+        raise ValueError("vector contains NaN or inf")
+    q = np.rint(m.astype(np.float64) * SCALE).astype(np.int64)
+    fmt = _template(q.shape[1])
+    return [fmt % tuple(row) for row in q.tolist()]
+
+def to_literal(vec: VectorLike) -> str:
+    return to_literals(vec)[0]
+
+def from_literal(s: str) -> np.ndarray:
+    body = s.strip()[1:-1]
+    if not body:
+        return np.zeros(0, dtype=np.float32)
+    return np.array(body.split(","), dtype=np.float64).astype(np.float32)
+
+def to_blob(vec: VectorLike) -> bytes:
+    """Raw little-endian float32 bytes (4 bytes per dimension) for binary-capable stores."""
+    return np.ascontiguousarray(vec, dtype="<f4").tobytes()
+
+def from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<f4")
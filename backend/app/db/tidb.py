@@ -1,4 +1,95 @@
-import os
+import math, os, threading
+from typing import List, Optional, Tuple
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 
-ENGINE = create_engine(os.environ["TIDB_URL"], pool_pre_ping=True)
+from ..data.geo import split_antimeridian
+
+_engine: Optional[Engine] = None
+
+def configured() -> bool:
+    return bool(os.getenv("TIDB_URL"))
+
+def get_engine() -> Engine:
+    """The TiDB engine, created on first use (importing this module needs no TIDB_URL)."""
+    global _engine
+    if _engine is None:
+        url = os.getenv("TIDB_URL")
+        if not url:
+            raise RuntimeError("TIDB_URL is not set")
+        _engine = create_engine(url, pool_pre_ping=True)
+    return _engine
+
+def __getattr__(name: str):
+    # keeps `from ..db.tidb import ENGINE` working, lazily
+    if name == "ENGINE":
+        return get_engine()
+    raise AttributeError(name)
+
+# Coarse spatial key for indexed geo prefilters: 0.25-degree cells (~28 km of latitude)
+CELLS_PER_DEG = 4
+CELL_LON_SPAN = 360 * CELLS_PER_DEG
+CELL_SQL = (f"(FLOOR((lat + 90) * {CELLS_PER_DEG}) * {CELL_LON_SPAN} "
+            f"+ FLOOR((lon + 180) * {CELLS_PER_DEG}))")
+
+# Shared by the app and scripts/seed_tidb_from_sqlite.py. category and cell are
+# generated from props/lat/lon, so every writer gets them (and old rows are covered).
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS reports (
+      id BIGINT AUTO_INCREMENT PRIMARY KEY,
+      lat DOUBLE,
+      lon DOUBLE,
+      text TEXT,
+      props JSON,
+      created_at TIMESTAMP NULL,
+      embedding VECTOR(1536)
+    )
+    """,
+    "ALTER TABLE reports ADD COLUMN IF NOT EXISTS category VARCHAR(64) "
+    "AS (JSON_UNQUOTE(JSON_EXTRACT(props, '$.category'))) VIRTUAL",
+    f"ALTER TABLE reports ADD COLUMN IF NOT EXISTS cell BIGINT AS {CELL_SQL} VIRTUAL",
+    "CREATE INDEX IF NOT EXISTS idx_reports_created ON reports (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_cell ON reports (cell, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_category ON reports (category, created_at)",
+    "CREATE VECTOR INDEX IF NOT EXISTS idx_reports_embed "
+    "ON reports ((VEC_COSINE_DISTANCE(embedding))) USING HNSW",
+]
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def ensure_schema(engine=None) -> None:
+    """Create/upgrade the reports table and its indexes (once per process)."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready and engine is None:
+            return
+        with (engine or get_engine()).begin() as cx:
+            for stmt in SCHEMA:
+                cx.execute(text(stmt))
+        if engine is None:
+            _schema_ready = True
+
+def cell_id(lat: float, lon: float) -> int:
+    """Python twin of CELL_SQL."""
+    return (math.floor((lat + 90) * CELLS_PER_DEG) * CELL_LON_SPAN
+            + math.floor((lon + 180) * CELLS_PER_DEG))
+
+def cells_for_bbox(bbox: Tuple[float, float, float, float], max_cells: int) -> Optional[List[int]]:
+    """Cell ids covering (min_lon, min_lat, max_lon, max_lat), or None if more than max_cells."""
+    ranges = []
+    n = 0
+    for min_lon, min_lat, max_lon, max_lat in split_antimeridian(bbox):
+        y0 = math.floor((max(min_lat, -90.0) + 90) * CELLS_PER_DEG)
+        y1 = math.floor((min(max_lat, 90.0) + 90) * CELLS_PER_DEG)
+        x0 = math.floor((max(min_lon, -180.0) + 180) * CELLS_PER_DEG)
+        x1 = math.floor((min(max_lon, 180.0) + 180) * CELLS_PER_DEG)
+        n += (y1 - y0 + 1) * (x1 - x0 + 1)
+        ranges.append((y0, y1, x0, x1))
+    if n > max_cells:
+        return None
+    return sorted({y * CELL_LON_SPAN + x
+                   for y0, y1, x0, x1 in ranges
+                   for y in range(y0, y1 + 1)
+                   for x in range(x0, x1 + 1)})
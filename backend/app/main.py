@@ -1,11 +1,78 @@
+import asyncio, functools, logging, threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 from .config.settings import settings
+from .services.feeds import FEEDS
+from .services.http_client import HTTP
+from .services.events import EVENTS
+from .services import reactions as reactions_svc
+from .services.outbox import OUTBOX
 
-app = FastAPI(title="PulseMap Agent – API", version="0.2.0")
+log = logging.getLogger(__name__)
+
+# set at shutdown; long startup jobs check it between steps
+_STOP = threading.Event()
+
+def _warm_tracts() -> None:
+    from .services.tracts import warm
+    warm()  # also backfills tracts of reports stored before they were loaded
+
+def _sync_vectors() -> None:
+    from .services.search import sync_local_index
+    n = sync_local_index(stop=_STOP)
+    if n:
+        log.info("vector index: added %d reports", n)
+
+def _job_done(name: str, fut: asyncio.Future) -> None:
+    if not fut.cancelled() and fut.exception() is not None:
+        log.error("startup job %s failed", name, exc_info=fut.exception())
+
+def _run_job(jobs: list, name: str, fn, *args, **kwargs) -> None:
+    """Run fn in the default executor; failures are logged, shutdown waits for it."""
+    fut = asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+    fut.add_done_callback(functools.partial(_job_done, name))
+    jobs.append(fut)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    EVENTS.start()
+    await reactions_svc.start()
+    if settings.FEED_POLL_ENABLED:
+        FEEDS.start()
+    _STOP.clear()
+    jobs: list = []
+    if settings.TRACTS_WARM_ON_STARTUP:
+        _run_job(jobs, "tracts warm-up", _warm_tracts)
+    if settings.TRACT_TILES_PRESEED_ZOOM:
+        from .services.tract_tiles import preseed
+        _run_job(jobs, "tract tile preseed", preseed, settings.TRACT_TILES_PRESEED_ZOOM, stop=_STOP)
+    from .services import search
+    if settings.VECTOR_SYNC_ON_STARTUP and search.backend() == "local":
+        _run_job(jobs, "vector index sync", _sync_vectors)
+    if settings.OUTBOX_ENABLED:
+        OUTBOX.start()
+    yield
+    # executor threads cannot be cancelled: ask the long jobs to stop, then wait for
+    # all of them before the store and the vector index are closed under them
+    _STOP.set()
+    await asyncio.gather(*jobs, return_exceptions=True)
+    await FEEDS.stop()
+    await OUTBOX.stop()
+    await HTTP.aclose()
+    await reactions_svc.stop()
+    from .agents.graph import close_async_app
+    await close_async_app()
+    from .services.embeddings import BATCHER
+    await BATCHER.aclose()
+    search.save_local_index()
+    from .data.store import ENGINE as REPORTS_DB
+    REPORTS_DB.close()
+
+app = FastAPI(title="PulseMap Agent – API", version="0.2.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,7 +90,8 @@ app.add_middleware(
 app.mount("/uploads", StaticFiles(directory=str(settings.UPLOADS_DIR)), name="uploads")
 
 # Routers
-from .routers import chat, reports, feeds, uploads, geo, reactions, config  # noqa
+from .routers import chat, reports, feeds, uploads, geo, reactions, config, events  # noqa
+from .routers import search as search_router
 from .routers.feeds import updates as updates_router
 app.include_router(chat.router)
 app.include_router(reports.router)
@@ -33,6 +101,8 @@ app.include_router(uploads.router)
 app.include_router(geo.router)
 app.include_router(reactions.router)
 app.include_router(config.router)
+app.include_router(events.router)
+app.include_router(search_router.router)
 
 if settings.FRONTEND_DIST.exists():
     app.mount("/", StaticFiles(directory=str(settings.FRONTEND_DIST), html=True), name="spa")
@@ -1,25 +1,60 @@
+import json, logging
 from fastapi import APIRouter, Body
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
 
-from ..services.chat_agent import run_chat
+from ..services.chat_agent import arun_chat, astream_chat
+from ..agents.classifier import stats as classifier_stats_
+
+log = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+def _sse(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n".encode()
+
 @router.post("")
-def chat(payload: Dict[str, Any] = Body(...)):
+async def chat(payload: Dict[str, Any] = Body(...)):
     """
     Body: { "message": str, "user_location": {lat,lon}?, "session_id"?: str, "photo_url"?: str }
     """
     msg = payload.get("message", "")
     if not isinstance(msg, str) or not msg.strip():
         return {"reply": "Please type something.", "tool_used": None}
-    return run_chat(
+    return await arun_chat(
         message=msg.strip(),
         user_location=payload.get("user_location"),
         session_id=payload.get("session_id"),
         photo_url=payload.get("photo_url"),
     )
 
+@router.post("/stream")
+async def chat_stream(payload: Dict[str, Any] = Body(...)):
+    """
+    Same body as /chat; replies as Server-Sent Events:
+    session, token*, tool_start/tool_end, then done (the /chat response) or error.
+    """
+    msg = payload.get("message", "")
+
+    async def stream():
+        if not isinstance(msg, str) or not msg.strip():
+            yield _sse("done", {"reply": "Please type something.", "tool_used": None})
+            return
+        try:
+            async for event, data in astream_chat(
+                message=msg.strip(),
+                user_location=payload.get("user_location"),
+                session_id=payload.get("session_id"),
+                photo_url=payload.get("photo_url"),
+            ):
+                yield _sse(event, data)
+        except Exception as e:
+            log.exception("chat stream failed")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.post("/reset")
 def reset_chat(payload: Dict[str, Any] = Body(...)):
     sid = payload.get("session_id")
@@ -27,3 +62,8 @@ def reset_chat(payload: Dict[str, Any] = Body(...)):
         return {"ok": False, "error": "session_id required"}
     # Same guidance as before—client can rotate session_id for SqliteSaver threads.
     return {"ok": True}
+
+@router.get("/classifier/stats")
+def classifier_stats():
+    # Cache counters (memory hits, SQLite hits, misses) and which path served each report
+    return classifier_stats_()
@@ -0,0 +1,73 @@
+# backend/app/routers/events.py
+import asyncio, json
+from typing import Optional
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from ..services.events import EVENTS, BBox
+from .reports import _parse_bbox
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+KEEPALIVE_S = 15.0   # idle proxies drop silent connections
+WORLD: BBox = (-180.0, -90.0, 180.0, 90.0)
+
+def _sse(event: dict) -> bytes:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n".encode()
+
+@router.get("")
+async def events(request: Request, bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat")):
+    """
+    Server-Sent Events for the given viewport: `report` (new user report),
+    `reaction` (new verify/clear counts) and `feed` (new official feed item).
+    Reconnect with a new bbox when the viewport moves.
+    """
+    sub = EVENTS.subscribe(_parse_bbox(bbox) or WORLD)
+
+    async def stream():
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            EVENTS.unsubscribe(sub)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/ws")
+async def events_ws(ws: WebSocket, bbox: Optional[str] = None):
+    """Same events over a WebSocket; send {"bbox": "minLon,minLat,maxLon,maxLat"} to move the viewport."""
+    await ws.accept()
+    try:
+        box = _parse_bbox(bbox) or WORLD
+    except Exception:
+        await ws.close(code=1008)
+        return
+    sub = EVENTS.subscribe(box)
+
+    async def pump():
+        while True:
+            await ws.send_json(await sub.queue.get())
+
+    sender = asyncio.create_task(pump())
+    try:
+        while True:
+            msg = await ws.receive_json()
+            try:
+                EVENTS.move(sub, _parse_bbox(msg.get("bbox")) or WORLD)
+            except Exception:
+                await ws.send_json({"type": "error", "detail": "bbox must be minLon,minLat,maxLon,maxLat"})
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        sender.cancel()
+        EVENTS.unsubscribe(sub)
+
+@router.get("/stats")
+def events_stats():
+    return EVENTS.stats()
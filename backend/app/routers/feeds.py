@@ -1,20 +1,20 @@
 from fastapi import APIRouter, HTTPException
 from typing import Any, Dict, Optional
 from ..services.feeds import (
-    fetch_usgs_quakes_geojson, fetch_nws_alerts_geojson,
-    eonet_geojson_points, firms_geojson_points, 
+    feed_geojson, eonet_geojson_points, firms_geojson_points,
     local_updates as _local_updates, global_updates as _global_updates
 )
+from ..services.http_client import HTTP
 
 router = APIRouter(prefix="/feeds", tags=["feeds"])
 
 @router.get("/usgs")
 async def usgs():
-    return {"data": await fetch_usgs_quakes_geojson()}
+    return {"data": await feed_geojson("usgs")}
 
 @router.get("/nws")
 async def nws():
-    return {"data": await fetch_nws_alerts_geojson()}
+    return {"data": await feed_geojson("nws")}
 
 @router.get("/eonet")
 async def eonet():
@@ -25,16 +25,24 @@ async def firms():
     # Return pointified features for map markers
     return {"data": await firms_geojson_points()}
 
+@router.get("/stats")
+def stats():
+    # Per-source upstream counters: requests, 304s (hit_rate), errors, bytes on the wire
+    return {"sources": HTTP.stats()}
+
 # Convenience endpoints parallel to your previous design
 updates = APIRouter(prefix="/updates", tags=["updates"])
 
 @updates.get("/local")
 async def local_updates(lat: float, lon: float, radius_miles: float = 25.0,
-                        max_age_hours: int = 48, limit: int = 100):
-    return await _local_updates(lat, lon, radius_miles, max_age_hours, limit)
+                        max_age_hours: int = 48, limit: int = 100,
+                        reactions: bool = False, session_id: Optional[str] = None):
+    # reactions=true inlines verify/clear counts (and `me` for session_id) on report items
+    return await _local_updates(lat, lon, radius_miles, max_age_hours, limit, reactions, session_id)
 
 @updates.get("/global")
-async def global_updates(limit: int = 200, max_age_hours: Optional[int] = None):
-    return await _global_updates(limit, max_age_hours)
+async def global_updates(limit: int = 200, max_age_hours: Optional[int] = None,
+                         reactions: bool = False, session_id: Optional[str] = None):
+    return await _global_updates(limit, max_age_hours, reactions, session_id)
 
 router.include_router(updates)
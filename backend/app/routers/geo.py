@@ -1,14 +1,29 @@
 # apps/api/routes/geo.py
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
 from ..services.tracts import get_tracts_by_bbox
+from ..services.tract_tiles import get_tile, valid_tile
 
 router = APIRouter(prefix="/geo", tags=["geo"])
 
 @router.get("/tracts")
-def tracts(bbox: str = Query(..., description="minLon,minLat,maxLon,maxLat")):
+def tracts(
+    bbox: str = Query(..., description="minLon,minLat,maxLon,maxLat"),
+    stats: bool = Query(False, description="Include per-tract report counts and severity rollups"),
+):
     try:
         minx, miny, maxx, maxy = [float(x) for x in bbox.split(",")]
     except Exception:
         raise HTTPException(status_code=400, detail="bbox must be minLon,minLat,maxLon,maxLat")
-    return get_tracts_by_bbox((minx, miny, maxx, maxy))
+    # already-serialized GeoJSON bytes (shared across nearby pans via the bbox cache)
+    return Response(content=get_tracts_by_bbox((minx, miny, maxx, maxy), with_stats=stats), media_type="application/geo+json")
+
+@router.get("/tracts/tiles/{z}/{x}/{y}.mvt")
+def tract_tile(z: int, x: int, y: int):
+    """Census tracts as a Mapbox Vector Tile (layer "tracts"), cached on disk under DATA_DIR."""
+    if not valid_tile(z, x, y):
+        raise HTTPException(status_code=404, detail="tile out of range")
+    return Response(
+        content=get_tile(z, x, y),
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
@@ -1,8 +1,8 @@
 # apps/api/routes/reports.py
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal, List
-from ..services.reactions import react as svc_react, get_many as svc_get_many
+from ..services.reactions import react as svc_react, react_many as svc_react_many, get_many as svc_get_many
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -11,6 +11,20 @@ class ReactBody(BaseModel):
     value: bool
     session_id: str
 
+class BatchItem(BaseModel):
+    rid: str
+    action: Literal["verify", "clear"]
+    value: bool
+
+class BatchBody(BaseModel):
+    session_id: str
+    items: List[BatchItem] = Field(..., min_length=1, max_length=500)
+
+@router.post("/reactions/batch")
+async def react_batch(body: BatchBody):
+    # Items apply in order; the result holds the final state of each rid
+    return await svc_react_many(body.session_id, [(i.rid, i.action, i.value) for i in body.items])
+
 @router.post("/{rid}/react")
 async def react_route(rid: str, body: ReactBody):
     return await svc_react(rid, body.session_id, body.action, body.value)
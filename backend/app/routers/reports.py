@@ -1,11 +1,78 @@
-from fastapi import APIRouter
-from ..data.store import get_feature_collection, clear_reports
+import json
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from ..data.store import aget_feature_collection, iter_reports, clear_reports
+from ..services import reactions
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+STREAM_CHUNK = 200  # features per written chunk
+
+def _parse_bbox(bbox: Optional[str]):
+    if bbox is None:
+        return None
+    try:
+        minx, miny, maxx, maxy = [float(x) for x in bbox.split(",")]
+    except Exception:
+        raise HTTPException(status_code=400, detail="bbox must be minLon,minLat,maxLon,maxLat")
+    return (minx, miny, maxx, maxy)
+
+def _batches(features):
+    buf = []
+    for f in features:
+        buf.append(f)
+        if len(buf) >= STREAM_CHUNK:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+async def _chunks(features, with_reactions: bool, session_id: Optional[str]):
+    # rows are read in a worker thread; reactions are joined one chunk at a time
+    async for buf in iterate_in_threadpool(_batches(features)):
+        if with_reactions:
+            await reactions.attach([f["properties"] for f in buf], session_id)
+        yield [json.dumps(f, separators=(",", ":")) for f in buf]
+
+async def _ndjson(chunks):
+    async for buf in chunks:
+        yield ("\n".join(buf) + "\n").encode()
+
+async def _geojson(chunks):
+    yield b'{"type":"FeatureCollection","features":['
+    first = True
+    async for buf in chunks:
+        yield (("" if first else ",") + ",".join(buf)).encode()
+        first = False
+    yield b"]}"
+
 @router.get("")
-def reports():
-    return get_feature_collection()
+async def reports(
+    after_id: Optional[int] = Query(None, description="Keyset cursor: only reports with id < after_id"),
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    stream: Optional[Literal["ndjson", "geojson"]] = Query(None, description="Stream rows from the cursor"),
+    reactions_: bool = Query(False, alias="reactions", description="Inline verify/clear counts"),
+    session_id: Optional[str] = Query(None, description="With reactions, add this session's `me` flags"),
+):
+    """
+    GeoJSON FeatureCollection of user reports, newest first.
+    With `limit`, the response carries `next_after_id` for the next page.
+    With `stream`, rows are written as NDJSON or a chunked FeatureCollection as they are read.
+    With `reactions`, each feature's properties carry verify_count/clear_count (and `me`).
+    """
+    box = _parse_bbox(bbox)
+    if stream is None:
+        fc = await aget_feature_collection(after_id=after_id, limit=limit, bbox=box)
+        if reactions_:
+            await reactions.attach([f["properties"] for f in fc["features"]], session_id)
+        return fc
+    chunks = _chunks(iter_reports(after_id=after_id, limit=limit, bbox=box), reactions_, session_id)
+    if stream == "ndjson":
+        return StreamingResponse(_ndjson(chunks), media_type="application/x-ndjson")
+    return StreamingResponse(_geojson(chunks), media_type="application/geo+json")
 
 @router.post("/clear")
 def clear_reports_api():
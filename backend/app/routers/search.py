@@ -1,41 +1,57 @@
-from fastapi import APIRouter, Query
-from sqlalchemy import text
-from ..db.tidb import ENGINE
-from openai import OpenAI
-import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from ..config.settings import settings
+from ..services.embeddings import aembed_text
+from ..services.search import search_reports, decode_cursor
+from ..services.outbox import OUTBOX
+from .reports import _parse_bbox
 
 router = APIRouter(prefix="/search", tags=["search"])
-client = OpenAI()
-
-def embed(q: str) -> list[float]:
-    out = client.embeddings.create(model="text-embedding-3-small", input=[q])
-    return out.data[0].embedding
 
 @router.get("")
-def search(q: str = Query(...), k: int = 10):
-    qemb = embed(q)
-    qvec = "[" + ",".join(f"{x:.7f}" for x in qemb) + "]"
+async def search(
+    q: str = Query(...),
+    k: int = Query(10, ge=1, le=100),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=20000),
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    since: Optional[datetime] = Query(None, description="Only reports created at/after this ISO time"),
+    category: Optional[str] = Query(None, description="Taxonomy id, e.g. road.flood"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """
+    Semantic search over reports, optionally restricted to a circle (lat/lon/radius_km),
+    a bbox, a time window and a category. Each feature carries `distance` (cosine)
+    and, with lat/lon, `distance_km`.
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon go together")
+    if radius_km is not None and lat is None:
+        raise HTTPException(status_code=400, detail="radius_km needs lat/lon")
+    if lat is not None and radius_km is None:
+        radius_km = settings.DEFAULT_RADIUS_KM
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"bad cursor: {e}")
+    box = _parse_bbox(bbox)
+    # concurrent searches share one embeddings request; the scan runs off the event loop
+    qvec = await aembed_text(q)
+    return await run_in_threadpool(
+        search_reports, q, k, lat=lat, lon=lon, radius_km=radius_km, bbox=box,
+        since=since, category=category, cursor=cursor, qvec=qvec,
+    )
 
-    sql = text(f"""
-        SELECT id, lat, lon, text, props, created_at,
-               VEC_COSINE_DISTANCE(embedding, :qvec) AS dist
-        FROM reports
-        ORDER BY VEC_COSINE_DISTANCE(embedding, :qvec)
-        LIMIT :k
-    """)
-    with ENGINE.begin() as cx:
-        rows = cx.execute(sql, {"qvec": qvec, "k": int(k)}).fetchall()
+@router.get("/outbox")
+def outbox_stats():
+    """Vector-store sync queue: entries per state (pending/done/dead) and worker counters."""
+    return OUTBOX.stats()
 
-    # shape as GeoJSON Features for your map
-    feats = []
-    for r in rows:
-        rid, lat, lon, txt, props, created = r[:6]
-        feats.append({
-            "type": "Feature",
-            "geometry": {"type": "Point", "coordinates": [float(lon), float(lat)]},
-            "properties": {
-                "id": str(rid), "text": txt, "reported_at": str(created),
-                **(json.loads(props or "{}"))
-            },
-        })
-    return {"features": feats}
+@router.post("/outbox/retry")
+def outbox_retry():
+    """Requeue dead-lettered entries."""
+    return {"requeued": OUTBOX.retry_dead()}
@@ -1,26 +1,78 @@
-from typing import Dict, Any, Optional
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from ..agents.graph import APP
+import json
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from uuid import uuid4
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
+from ..agents.graph import APP, get_async_app
 
-def run_chat(message: str,
-             user_location: Optional[Dict[str, float]] = None,
-             session_id: Optional[str] = None,
-             photo_url: Optional[str] = None) -> Dict[str, Any]:
-    from uuid import uuid4
+REPORT_TOOLS = {"add_report", "find_reports_near"}
+
+def _prepare(message: str, user_location, session_id, photo_url):
     sid = session_id or str(uuid4())
     init = {"messages": [HumanMessage(content=message)], "user_location": user_location, "photo_url": photo_url}
     cfg = {"configurable": {"thread_id": sid}}
-    final = APP.invoke(init, config=cfg)
+    return sid, init, cfg
 
+def _parse_tool_output(content: Any) -> Any:
+    try:
+        return json.loads(content) if isinstance(content, str) else content
+    except Exception:
+        return {"raw": content}
+
+def _result(messages: List[BaseMessage], sid: str) -> Dict[str, Any]:
     reply, tool_used, tool_result = "", None, None
-    for m in final["messages"]:
+    for m in messages:
         if isinstance(m, AIMessage):
             reply = m.content or reply
-        elif isinstance(m, ToolMessage) and getattr(m, "name", None) in {"add_report", "find_reports_near"}:
-            import json
-            try:
-                tool_used = m.name
-                tool_result = json.loads(m.content) if isinstance(m.content, str) else m.content
-            except Exception:
-                tool_result = {"raw": m.content}
+        elif isinstance(m, ToolMessage) and getattr(m, "name", None) in REPORT_TOOLS:
+            tool_used = m.name
+            tool_result = _parse_tool_output(m.content)
     return {"reply": reply, "tool_used": tool_used, "tool_result": tool_result, "session_id": sid}
+
+def run_chat(message: str,
+             user_location: Optional[Dict[str, float]] = None,
+             session_id: Optional[str] = None,
+             photo_url: Optional[str] = None) -> Dict[str, Any]:
+    sid, init, cfg = _prepare(message, user_location, session_id, photo_url)
+    final = APP.invoke(init, config=cfg)
+    return _result(final["messages"], sid)
+
+async def arun_chat(message: str,
+                    user_location: Optional[Dict[str, float]] = None,
+                    session_id: Optional[str] = None,
+                    photo_url: Optional[str] = None) -> Dict[str, Any]:
+    sid, init, cfg = _prepare(message, user_location, session_id, photo_url)
+    app = await get_async_app()
+    final = await app.ainvoke(init, config=cfg)
+    return _result(final["messages"], sid)
+
+async def astream_chat(message: str,
+                       user_location: Optional[Dict[str, float]] = None,
+                       session_id: Optional[str] = None,
+                       photo_url: Optional[str] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (event, data) while the graph runs:
+      session    {"session_id"}      first, so a new client learns its thread id
+      token      {"text"}            agent reply tokens as the model produces them
+      tool_start {"name", "input"}
+      tool_end   {"name", "output"}
+      done       same body as run_chat
+    """
+    sid, init, cfg = _prepare(message, user_location, session_id, photo_url)
+    app = await get_async_app()
+    yield "session", {"session_id": sid}
+    async for ev in app.astream_events(init, config=cfg, version="v2"):
+        kind = ev["event"]
+        if kind == "on_chat_model_stream":
+            # only the agent's reply; the classifier inside add_report is an LLM call too
+            if ev.get("metadata", {}).get("langgraph_node") != "agent":
+                continue
+            text = ev["data"]["chunk"].content
+            if isinstance(text, str) and text:
+                yield "token", {"text": text}
+        elif kind == "on_tool_start":
+            yield "tool_start", {"name": ev["name"], "input": ev["data"].get("input")}
+        elif kind == "on_tool_end":
+            out = ev["data"].get("output")
+            yield "tool_end", {"name": ev["name"], "output": _parse_tool_output(getattr(out, "content", out))}
+    state = await app.aget_state(cfg)
+    yield "done", _result(state.values.get("messages", []), sid)
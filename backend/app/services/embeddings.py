@@ -0,0 +1,166 @@
+# backend/app/services/embeddings.py
+from __future__ import annotations
+import asyncio, hashlib, sqlite3, threading, time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+from ..data.vectors import as_matrix, from_blob, to_blob
+
+EMBED_MODEL = "text-embedding-3-small"  # 1536-d
+EMBED_DIM = 1536
+API_BATCH = 256                         # texts per embeddings.create call
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+class EmbeddingCache:
+    """(model, sha256(text)) -> float32 vector bytes, in SQLite. Thread-safe."""
+
+    def __init__(self, path) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+              model TEXT NOT NULL,
+              hash BLOB NOT NULL,
+              vec BLOB NOT NULL,
+              created_at INTEGER NOT NULL,
+              PRIMARY KEY (model, hash)
+            ) WITHOUT ROWID
+        """)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model: str, hashes: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        out: Dict[bytes, np.ndarray] = {}
+        uniq = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(uniq), 900):
+                chunk = uniq[i:i + 900]
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk],
+                ).fetchall()
+                for h, blob in rows:
+                    out[h] = from_blob(blob)
+            self.hits += len(out)
+            self.misses += len(uniq) - len(out)
+        return out
+
+    def put_many(self, model: str, items: Dict[bytes, np.ndarray]) -> None:
+        now = int(time.time())
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vec, created_at) VALUES (?,?,?,?)",
+                [(model, h, to_blob(v), now) for h, v in items.items()],
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+CACHE = EmbeddingCache(settings.EMBEDDINGS_DB)
+
+_client = None
+
+def _openai():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()  # uses OPENAI_API_KEY
+    return _client
+
+def _call_api(texts: List[str], model: str) -> np.ndarray:
+    out = _openai().embeddings.create(model=model, input=texts)
+    return as_matrix([d.embedding for d in out.data])
+
+def embed_texts(texts: Sequence[str], model: str = EMBED_MODEL) -> np.ndarray:
+    """
+    (len(texts), dim) float32 matrix. Cached vectors are reused; the rest are
+    de-duplicated and fetched in API_BATCH-sized calls, then cached.
+    """
+    if not texts:
+        return np.zeros((0, EMBED_DIM), dtype=np.float32)
+    hashes = [text_hash(t) for t in texts]
+    found = CACHE.get_many(model, hashes)
+    todo: Dict[bytes, str] = {}
+    for h, t in zip(hashes, texts):
+        if h not in found:
+            todo.setdefault(h, t)
+    if todo:
+        keys = list(todo)
+        fresh: Dict[bytes, np.ndarray] = {}
+        for i in range(0, len(keys), API_BATCH):
+            chunk = keys[i:i + API_BATCH]
+            vecs = _call_api([todo[h] for h in chunk], model)
+            fresh.update(zip(chunk, vecs))
+        CACHE.put_many(model, fresh)
+        found.update(fresh)
+    return np.stack([found[h] for h in hashes])
+
+def embed_text(text: str, model: str = EMBED_MODEL) -> np.ndarray:
+    return embed_texts([text], model)[0]
+
+class EmbeddingBatcher:
+    """
+    Groups concurrent async embed() calls into one embed_texts() call:
+    a batch closes at max_batch texts or max_wait_ms after its first text.
+    """
+
+    def __init__(self, model: str = EMBED_MODEL, max_batch: int = 64, max_wait_ms: float = 10.0) -> None:
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run(), name="embedding-batcher")
+        assert self._queue is not None
+        return self._queue
+
+    async def embed(self, text: str) -> np.ndarray:
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._ensure_worker().put_nowait((text, fut))
+        return await fut
+
+    async def _run(self) -> None:
+        q = self._queue
+        assert q is not None
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(q.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                vecs = await asyncio.to_thread(embed_texts, [t for t, _ in batch], self.model)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), v in zip(batch, vecs):
+                if not fut.done():
+                    fut.set_result(v)
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+BATCHER = EmbeddingBatcher(max_batch=settings.EMBED_BATCH_MAX, max_wait_ms=settings.EMBED_BATCH_WAIT_MS)
+
+async def aembed_text(text: str) -> np.ndarray:
+    return await BATCHER.embed(text)
@@ -0,0 +1,146 @@
+# backend/app/services/events.py
+from __future__ import annotations
+import asyncio, logging, math
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..data.geo import split_antimeridian as _boxes
+
+log = logging.getLogger(__name__)
+
+BBox = Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+
+CELL_DEG = 1.0       # subscription grid cell size
+MAX_CELLS = 2048     # viewports spanning more cells are matched by bbox test instead
+QUEUE_SIZE = 256     # per-subscriber backlog; the oldest event is dropped when full
+
+Cell = Tuple[int, int]
+
+def _cell(lat: float, lon: float) -> Cell:
+    return math.floor(lat / CELL_DEG), math.floor(lon / CELL_DEG)
+
+def _cells(bbox: BBox) -> Iterator[Cell]:
+    for min_lon, min_lat, max_lon, max_lat in _boxes(bbox):
+        (y0, x0), (y1, x1) = _cell(min_lat, min_lon), _cell(max_lat, max_lon)
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                yield y, x
+
+def _n_cells(bbox: BBox) -> int:
+    n = 0
+    for min_lon, min_lat, max_lon, max_lat in _boxes(bbox):
+        (y0, x0), (y1, x1) = _cell(min_lat, min_lon), _cell(max_lat, max_lon)
+        n += (y1 - y0 + 1) * (x1 - x0 + 1)
+    return n
+
+class Subscriber:
+    __slots__ = ("bbox", "queue", "cells", "dropped")
+
+    def __init__(self, bbox: BBox) -> None:
+        self.bbox = bbox
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(QUEUE_SIZE)
+        self.cells: List[Cell] = []   # empty = registered in the wide set
+        self.dropped = 0
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return any(
+            min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+            for min_lon, min_lat, max_lon, max_lat in _boxes(self.bbox)
+        )
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            # a slow client loses its oldest event rather than stalling publishers
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+class EventBus:
+    """
+    Viewport-keyed fan-out for live map events.
+      - subscribers register a bbox; it is indexed under the grid cells it covers
+      - publish(lat, lon) looks up one cell and bbox-tests only its subscribers
+      - very wide viewports live in a small set that is tested on every publish
+    All index mutation happens on the event loop; publish_threadsafe() hops there.
+    """
+
+    def __init__(self) -> None:
+        self._grid: Dict[Cell, Set[Subscriber]] = {}
+        self._wide: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.delivered = 0
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._grid or self._wide)
+
+    def subscribe(self, bbox: BBox) -> Subscriber:
+        sub = Subscriber(bbox)
+        self._index(sub)
+        return sub
+
+    def move(self, sub: Subscriber, bbox: BBox) -> None:
+        self._unindex(sub)
+        sub.bbox = bbox
+        self._index(sub)
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._unindex(sub)
+
+    def _index(self, sub: Subscriber) -> None:
+        if _n_cells(sub.bbox) > MAX_CELLS:
+            self._wide.add(sub)
+            return
+        sub.cells = list(dict.fromkeys(_cells(sub.bbox)))
+        for c in sub.cells:
+            self._grid.setdefault(c, set()).add(sub)
+
+    def _unindex(self, sub: Subscriber) -> None:
+        self._wide.discard(sub)
+        for c in sub.cells:
+            subs = self._grid.get(c)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._grid[c]
+        sub.cells = []
+
+    def publish(self, kind: str, lat: float, lon: float, data: Dict[str, Any]) -> int:
+        """Deliver one event to every subscriber whose viewport contains (lat, lon)."""
+        self.published += 1
+        targets = [s for s in self._grid.get(_cell(lat, lon), ()) if s.contains(lat, lon)]
+        targets += [s for s in self._wide if s.contains(lat, lon)]
+        if not targets:
+            return 0
+        event = {"type": kind, "lat": lat, "lon": lon, "data": data}
+        for s in targets:
+            s.offer(event)
+        self.delivered += len(targets)
+        return len(targets)
+
+    def publish_threadsafe(self, kind: str, lat: float, lon: float, data: Dict[str, Any]) -> None:
+        """publish() from any thread (e.g. a tool running in the threadpool)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # no server loop: nobody can be listening
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.publish(kind, lat, lon, data)
+        else:
+            loop.call_soon_threadsafe(self.publish, kind, lat, lon, data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len({s for subs in self._grid.values() for s in subs} | self._wide),
+            "cells": len(self._grid),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+EVENTS = EventBus()
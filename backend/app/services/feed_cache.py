@@ -0,0 +1,186 @@
+# backend/app/services/feed_cache.py
+from __future__ import annotations
+import asyncio, dataclasses, functools, itertools, logging, time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from ..data.geo import haversine_km_np
+
+log = logging.getLogger(__name__)
+
+Fetch = Callable[[], Awaitable[Dict[str, Any]]]
+Normalize = Callable[[Dict[str, Any]], List[Dict[str, Any]]]
+Listener = Callable[[str, List[Dict[str, Any]]], None]
+
+def _update_key(u: Dict[str, Any]) -> tuple:
+    # normalized updates carry no stable id; this identifies one item across polls
+    return (u.get("kind"), u.get("sourceUrl") or u.get("title"), u.get("ts"), u.get("lat"), u.get("lon"))
+
+def _empty_fc() -> Dict[str, Any]:
+    return {"type": "FeatureCollection", "features": []}
+
+@dataclass
+class Snapshot:
+    """
+    Last good payload of one upstream feed plus its normalized updates.
+    `updates` are kept newest-first; lat/lon/ts are column arrays parallel to them
+    (ts = the update's epoch seconds, -inf if missing) so per-request radius/age
+    filtering is one vectorized mask and the newest-N is a prefix.
+    """
+    source: str
+    raw: Dict[str, Any]
+    updates: List[Dict[str, Any]]
+    fetched_at: float          # epoch seconds; 0 = never fetched successfully
+    error: Optional[str] = None
+    checked_at: float = 0.0    # last refresh attempt, failed or not (drives staleness)
+    lat: Optional[np.ndarray] = dataclasses.field(default=None, repr=False)
+    lon: Optional[np.ndarray] = dataclasses.field(default=None, repr=False)
+    ts: Optional[np.ndarray] = dataclasses.field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self.checked_at = self.checked_at or self.fetched_at
+        if self.lat is None:
+            n = len(self.updates)
+            self.updates = sorted(self.updates, key=lambda u: u.get("ts") or -np.inf, reverse=True)
+            self.lat = np.fromiter((u["lat"] for u in self.updates), dtype=np.float64, count=n)
+            self.lon = np.fromiter((u["lon"] for u in self.updates), dtype=np.float64, count=n)
+            self.ts = np.fromiter((u.get("ts") or -np.inf for u in self.updates), dtype=np.float64, count=n)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def stale_for(self) -> float:
+        return time.time() - self.checked_at
+
+    def select(self, lat: float, lon: float, radius_km: float, min_ts: float) -> List[Dict[str, Any]]:
+        """Updates within radius_km of (lat, lon) and not older than min_ts."""
+        if not self.updates:
+            return []
+        mask = self.ts >= min_ts
+        mask &= haversine_km_np(lat, lon, self.lat, self.lon) <= radius_km
+        return [self.updates[i] for i in np.flatnonzero(mask)]
+
+    def newest(self, min_ts: float = -np.inf) -> Iterator[Dict[str, Any]]:
+        """Updates not older than min_ts, newest first (a lazy prefix of `updates`)."""
+        k = int(np.searchsorted(-self.ts, -min_ts, side="right"))
+        return itertools.islice(self.updates, k)
+
+@dataclass
+class _Source:
+    fetch: Fetch
+    normalize: Normalize
+    interval: float
+    snapshot: Optional[Snapshot] = None
+    inflight: Optional[asyncio.Task] = None
+    background: Optional[asyncio.Future] = None  # the latest stale-while-revalidate refresh
+
+class FeedCache:
+    """
+    Shared, in-process cache for upstream hazard feeds.
+      - a background poller refreshes each source on its own interval
+      - readers get the last snapshot immediately (stale-while-revalidate)
+      - concurrent misses share one in-flight fetch per source (singleflight)
+      - listeners get the items a refresh added (never the initial load)
+    """
+
+    def __init__(self) -> None:
+        self._sources: Dict[str, _Source] = {}
+        self._pollers: List[asyncio.Task] = []
+        self._listeners: List[Listener] = []
+
+    def register(self, name: str, fetch: Fetch, normalize: Normalize, interval: float) -> None:
+        self._sources[name] = _Source(fetch=fetch, normalize=normalize, interval=float(interval))
+
+    def add_listener(self, fn: Listener) -> None:
+        self._listeners.append(fn)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._sources)
+
+    async def get(self, name: str) -> Snapshot:
+        src = self._sources[name]
+        snap = src.snapshot
+        if snap is None:
+            return await self.refresh(name)
+        if snap.stale_for > src.interval and (src.background is None or src.background.done()):
+            # serve stale now, revalidate in the background
+            src.background = asyncio.ensure_future(self.refresh(name))
+            src.background.add_done_callback(functools.partial(self._background_done, name))
+        return snap
+
+    @staticmethod
+    def _background_done(name: str, fut: asyncio.Future) -> None:
+        if not fut.cancelled() and fut.exception() is not None:
+            log.error("feed %s background refresh failed", name, exc_info=fut.exception())
+
+    async def get_all(self) -> Dict[str, Snapshot]:
+        snaps = await asyncio.gather(*(self.get(n) for n in self._sources))
+        return dict(zip(self._sources, snaps))
+
+    def refresh(self, name: str) -> Awaitable[Snapshot]:
+        src = self._sources[name]
+        if src.inflight is None or src.inflight.done():
+            src.inflight = asyncio.create_task(self._load(name, src))
+        # shield: a cancelled request must not cancel the fetch other callers wait on
+        return asyncio.shield(src.inflight)
+
+    async def _load(self, name: str, src: _Source) -> Snapshot:
+        try:
+            raw = await src.fetch() or _empty_fc()
+            prev = src.snapshot
+            if prev is not None and prev.raw is raw:
+                # a 304 hands back the very same payload object; keep its updates and arrays
+                now = time.time()
+                snap = dataclasses.replace(prev, fetched_at=now, checked_at=now, error=None)
+            else:
+                snap = Snapshot(source=name, raw=raw, updates=src.normalize(raw), fetched_at=time.time())
+        except Exception as e:
+            log.warning("feed %s refresh failed: %r", name, e)
+            if src.snapshot is not None:
+                # keep serving the last good payload; the next try waits another interval
+                src.snapshot = dataclasses.replace(src.snapshot, checked_at=time.time(), error=repr(e))
+                return src.snapshot
+            snap = Snapshot(source=name, raw=_empty_fc(), updates=[], fetched_at=0.0, error=repr(e),
+                            checked_at=time.time())
+        prev, src.snapshot = src.snapshot, snap
+        if self._listeners and prev is not None and prev.fetched_at and snap.updates is not prev.updates:
+            self._notify(name, prev, snap)
+        return snap
+
+    def _notify(self, name: str, prev: Snapshot, snap: Snapshot) -> None:
+        seen = {_update_key(u) for u in prev.updates}
+        added = [u for u in snap.updates if _update_key(u) not in seen]
+        if not added:
+            return
+        for fn in self._listeners:
+            try:
+                fn(name, added)
+            except Exception:
+                log.exception("feed %s listener failed", name)
+
+    async def _poll(self, name: str) -> None:
+        interval = self._sources[name].interval
+        while True:
+            try:
+                await self.refresh(name)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("feed %s poller error", name)
+            await asyncio.sleep(interval)
+
+    def start(self) -> None:
+        if self._pollers:
+            return
+        self._pollers = [asyncio.create_task(self._poll(n), name=f"feed-poll-{n}") for n in self._sources]
+
+    async def stop(self) -> None:
+        for t in self._pollers:
+            t.cancel()
+        await asyncio.gather(*self._pollers, return_exceptions=True)
+        self._pollers = []
@@ -1,13 +1,22 @@
-import asyncio
+import asyncio, heapq, time
+from itertools import islice
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional, List, Iterable, Tuple
 from dateutil import parser as dtparser
 
-from ..data.geo import haversine_km
 from .fetchers import (
     fetch_usgs_quakes_geojson, fetch_nws_alerts_geojson,
     fetch_eonet_events_geojson, fetch_firms_hotspots_geojson
 )
+from .feed_cache import FeedCache
+from . import reactions
+from .events import EVENTS
+
+# Poll intervals (seconds) roughly match how often each upstream publishes
+USGS_POLL_S = 60
+NWS_POLL_S = 120
+EONET_POLL_S = 600
+FIRMS_POLL_S = 600
 
 def _flatten_lonlats(coords: Any) -> List[Tuple[float, float]]:
     """Collect (lon, lat) pairs from nested coordinate arrays."""
@@ -41,6 +50,44 @@ def _centroid_from_geom(geom: Dict[str, Any]) -> Optional[Tuple[float, float]]:
     ys = [p[1] for p in pts]
     return (sum(xs) / len(xs), sum(ys) / len(ys))
 
+def _to_epoch(value: Any) -> Optional[int]:
+    """Epoch seconds from epoch-ms numbers or ISO-8601 strings; None if unparseable."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value / 1000) if value > 1e11 else int(value)
+    if isinstance(value, str) and value:
+        try:
+            t = dtparser.isoparse(value)
+        except Exception:
+            return None
+        if not t.tzinfo:
+            t = t.replace(tzinfo=timezone.utc)
+        return int(t.timestamp())
+    return None
+
+def _stamp(*candidates: Any) -> Tuple[int, str]:
+    """(epoch, ISO-8601 UTC) for the first parseable candidate; falls back to now."""
+    for c in candidates:
+        ts = _to_epoch(c)
+        if ts is not None:
+            break
+    else:
+        ts = int(time.time())
+    return ts, datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+def _firms_epoch(p: Dict[str, Any]) -> Optional[int]:
+    """FIRMS splits acquisition time into acq_date (YYYY-MM-DD) and acq_time (HHMM, UTC)."""
+    if p.get("acq_datetime"):
+        return _to_epoch(p["acq_datetime"])
+    d, t = p.get("acq_date"), p.get("acq_time")
+    if not d:
+        return None
+    try:
+        hhmm = str(t or "0").strip().zfill(4)
+        dt = datetime.strptime(f"{d} {hhmm}", "%Y-%m-%d %H%M").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return _to_epoch(d)
+    return int(dt.timestamp())
+
 def _mk_point_feature(lon: float, lat: float, props: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "type": "Feature",
@@ -58,6 +105,7 @@ def _report_to_update(f: Dict[str, Any]) -> Dict[str, Any]:
         "title": p.get("title") or p.get("text") or "User report",
         "emoji": p.get("emoji") or "📝",
         "time": p.get("reported_at"),
+        "ts": _to_epoch(p.get("reported_at")),
         "lat": float(lat), "lon": float(lon),
         "severity": p.get("severity"),
         "sourceUrl": None,
@@ -72,12 +120,8 @@ def _quake_to_update(f: Dict[str, Any]) -> Dict[str, Any] | None:
     lon, lat = g["coordinates"][:2]
     title = p.get("place") or p.get("title") or "Earthquake"
     mag = p.get("mag") or p.get("Magnitude") or p.get("m")
-    ts = p.get("time")
-    if isinstance(ts, (int, float)):
-        time_iso = datetime.fromtimestamp(ts/1000, tz=timezone.utc).isoformat()
-    else:
-        time_iso = p.get("updated") if isinstance(p.get("updated"), str) else datetime.now(timezone.utc).isoformat()
-    return {"kind": "quake", "title": title, "emoji": "💥", "time": time_iso,
+    ts, time_iso = _stamp(p.get("time"), p.get("updated"))
+    return {"kind": "quake", "title": title, "emoji": "💥", "time": time_iso, "ts": ts,
             "lat": float(lat), "lon": float(lon), "severity": f"M{mag}" if mag is not None else None,
             "sourceUrl": p.get("url") or p.get("detail"), "raw": p}
 
@@ -97,8 +141,8 @@ def _eonet_to_update(f: Dict[str, Any]) -> Dict[str, Any] | None:
     elif any(k in cat for k in ["ice","snow","blizzard"]): emoji = "❄️"
     elif any(k in cat for k in ["dust","smoke","haze"]): emoji = "🌫️"
     else: emoji = "⚠️"
-    time_iso = p.get("time") or p.get("updated") or datetime.now(timezone.utc).isoformat()
-    return {"kind": "eonet", "title": title, "emoji": emoji, "time": time_iso,
+    ts, time_iso = _stamp(p.get("time"), p.get("date"), p.get("updated"))
+    return {"kind": "eonet", "title": title, "emoji": emoji, "time": time_iso, "ts": ts,
             "lat": float(lat), "lon": float(lon), "sourceUrl": p.get("link") or p.get("url"), "raw": p}
 
 def _firms_to_update(f: Dict[str, Any]) -> Dict[str, Any] | None:
@@ -106,57 +150,34 @@ def _firms_to_update(f: Dict[str, Any]) -> Dict[str, Any] | None:
     g = f.get("geometry", {}) or {}
     if g.get("type") != "Point": return None
     lon, lat = g["coordinates"][:2]
-    time_iso = p.get("acq_datetime") or p.get("acq_date") or datetime.now(timezone.utc).isoformat()
+    ts, time_iso = _stamp(_firms_epoch(p))
     sev = p.get("confidence") or p.get("brightness") or p.get("frp")
-    return {"kind": "fire", "title": "Fire hotspot", "emoji": "🔥", "time": time_iso,
+    return {"kind": "fire", "title": "Fire hotspot", "emoji": "🔥", "time": time_iso, "ts": ts,
             "lat": float(lat), "lon": float(lon), "severity": sev, "sourceUrl": None, "raw": p}
 
-def _within(lat: float, lon: float, u: Dict[str, Any], radius_km: float) -> bool:
-    return haversine_km((lat, lon), (u["lat"], u["lon"])) <= radius_km
-
-def _is_recent(iso: str | None, max_age_hours: int) -> bool:
-    if not iso: return False
-    try:
-        t = dtparser.isoparse(iso)
-        if not t.tzinfo: t = t.replace(tzinfo=timezone.utc)
-    except Exception:
-        return False
-    return (datetime.now(timezone.utc) - t).total_seconds() <= max_age_hours * 3600
-
-async def _gather_feeds():
-    results = await asyncio.gather(
-        fetch_usgs_quakes_geojson(), fetch_nws_alerts_geojson(),
-        fetch_eonet_events_geojson(), fetch_firms_hotspots_geojson(),
-        return_exceptions=True
-    )
-    def ok(x): return {"features": []} if isinstance(x, Exception) or not x else x
-    return {"usgs": ok(results[0]), "nws": ok(results[1]), "eonet": ok(results[2]), "firms": ok(results[3])}
+def _by_newest(u: Dict[str, Any]) -> int:
+    return u.get("ts") or 0
 
-async def local_updates(lat: float, lon: float, radius_miles: float, max_age_hours: int, limit: int):
-    from ..data.store import find_reports_near
+async def local_updates(lat: float, lon: float, radius_miles: float, max_age_hours: int, limit: int,
+                        with_reactions: bool = False, session_id: Optional[str] = None):
+    from ..data.store import afind_reports_near
     km = float(radius_miles) * 1.609344
-    near_reports = find_reports_near(lat, lon, radius_km=km, limit=limit, max_age_hours=max_age_hours)
+    # the DB query (on the store's read pool) and the feed snapshots are awaited together
+    near_reports, feeds = await asyncio.gather(
+        afind_reports_near(lat, lon, radius_km=km, limit=limit, max_age_hours=max_age_hours),
+        FEEDS.get_all(),
+    )
     updates: List[Dict[str, Any]] = [_report_to_update(f) for f in near_reports]
-    feeds = await _gather_feeds()
-
-    for f in (feeds["usgs"].get("features") or []):
-        u = _quake_to_update(f)
-        if u and _is_recent(u["time"], max_age_hours) and _within(lat, lon, u, km):
-            updates.append(u)
-    for u in _nws_to_updates(feeds["nws"]):
-        if _is_recent(u["time"], max_age_hours) and _within(lat, lon, u, km):
-            updates.append(u)
-    for f in (feeds["eonet"].get("features") or []):
-        u = _eonet_to_update(f)
-        if u and _is_recent(u["time"], max_age_hours) and _within(lat, lon, u, km):
-            updates.append(u)
-    for f in (feeds["firms"].get("features") or []):
-        u = _firms_to_update(f)
-        if u and _is_recent(u["time"], max_age_hours) and _within(lat, lon, u, km):
-            updates.append(u)
-
-    updates.sort(key=lambda x: x["time"] or "", reverse=True)
-    return {"count": min(len(updates), limit), "updates": updates[:limit]}
+
+    min_ts = time.time() - max_age_hours * 3600
+    for snap in feeds.values():
+        updates.extend(snap.select(lat, lon, km, min_ts))
+
+    updates.sort(key=_by_newest, reverse=True)
+    updates = updates[:limit]
+    if with_reactions:
+        await reactions.attach(updates, session_id)
+    return {"count": len(updates), "updates": updates}
 
 def _nws_to_updates(fc: Dict[str, Any]) -> list[Dict[str, Any]]:
     out: list[Dict[str, Any]] = []
@@ -174,32 +195,54 @@ def _nws_to_updates(fc: Dict[str, Any]) -> list[Dict[str, Any]]:
         if not coords:
             continue
         sev = p.get("severity") or "Unknown"
-        issued = p.get("effective") or p.get("onset") or p.get("sent") or datetime.now(timezone.utc).isoformat()
+        ts, issued = _stamp(p.get("effective"), p.get("onset"), p.get("sent"))
         out.append({"kind": "nws", "title": p.get("event") or "NWS Alert", "emoji": "⚠️",
-                    "time": issued, "lat": float(coords[0]), "lon": float(coords[1]),
+                    "time": issued, "ts": ts, "lat": float(coords[0]), "lon": float(coords[1]),
                     "severity": sev, "sourceUrl": p.get("@id") or p.get("id"), "raw": p})
     return out
 
-async def global_updates(limit: int, max_age_hours: Optional[int]):
-    from ..data.store import get_feature_collection
-    fc = get_feature_collection()
-    reports = fc.get("features") or []
+def _features_to_updates(to_update):
+    def normalize(fc: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [u for f in (fc.get("features") or []) if (u := to_update(f))]
+    return normalize
+
+# One shared snapshot per upstream feed; /feeds/* and /updates/* all read from here
+FEEDS = FeedCache()
+FEEDS.register("usgs", fetch_usgs_quakes_geojson, _features_to_updates(_quake_to_update), USGS_POLL_S)
+FEEDS.register("nws", fetch_nws_alerts_geojson, _nws_to_updates, NWS_POLL_S)
+FEEDS.register("eonet", fetch_eonet_events_geojson, _features_to_updates(_eonet_to_update), EONET_POLL_S)
+FEEDS.register("firms", fetch_firms_hotspots_geojson, _features_to_updates(_firms_to_update), FIRMS_POLL_S)
+
+def _publish_feed_delta(name: str, added: List[Dict[str, Any]]) -> None:
+    if not EVENTS.active:
+        return
+    for u in added:
+        # "raw" is the full upstream record; clients fetch it via /feeds/* if needed
+        EVENTS.publish("feed", u["lat"], u["lon"], {k: v for k, v in u.items() if k != "raw"})
+
+FEEDS.add_listener(_publish_feed_delta)
+
+async def feed_geojson(name: str) -> Dict[str, Any]:
+    """Raw upstream FeatureCollection from the shared snapshot."""
+    return (await FEEDS.get(name)).raw
+
+async def global_updates(limit: int, max_age_hours: Optional[int],
+                         with_reactions: bool = False, session_id: Optional[str] = None):
+    from ..data.store import arecent_reports
+    reports, feeds = await asyncio.gather(arecent_reports(limit, max_age_hours), FEEDS.get_all())
     rep_updates = [_report_to_update(f) for f in reports]
-    feeds = await _gather_feeds()
-    nws_updates = _nws_to_updates(feeds["nws"])
-    quake_updates = [_ for f in (feeds["usgs"].get("features") or []) if (_ := _quake_to_update(f))]
-    eonet_updates = [_ for f in (feeds["eonet"].get("features") or []) if (_ := _eonet_to_update(f))]
-    firms_updates = [_ for f in (feeds["firms"].get("features") or []) if (_ := _firms_to_update(f))]
-
-    updates = rep_updates + nws_updates + quake_updates + eonet_updates + firms_updates
-    if max_age_hours is not None:
-        updates = [u for u in updates if _is_recent(u["time"], max_age_hours)]
-    updates.sort(key=lambda x: x["time"] or "", reverse=True)
-    return {"count": min(len(updates), limit), "updates": updates[:limit]}
+
+    # Every source is already newest-first: k-way merge and stop after `limit`
+    min_ts = time.time() - max_age_hours * 3600 if max_age_hours is not None else float("-inf")
+    streams = [rep_updates] + [snap.newest(min_ts) for snap in feeds.values()]
+    updates = list(islice(heapq.merge(*streams, key=_by_newest, reverse=True), limit))
+    if with_reactions:
+        await reactions.attach(updates, session_id)
+    return {"count": len(updates), "updates": updates}
 
 async def eonet_geojson_points() -> Dict[str, Any]:
     """Always return Point features for EONET (polygon events -> centroid)."""
-    fc = await fetch_eonet_events_geojson() or {}
+    fc = await feed_geojson("eonet")
     features = []
     for f in (fc.get("features") or []):
         g = f.get("geometry") or {}
@@ -220,7 +263,7 @@ async def eonet_geojson_points() -> Dict[str, Any]:
 
 async def firms_geojson_points() -> Dict[str, Any]:
     """Always return Point features for FIRMS (skip invalid rows)."""
-    fc = await fetch_firms_hotspots_geojson() or {}
+    fc = await feed_geojson("firms")
     features = []
     for f in (fc.get("features") or []):
         g = f.get("geometry") or {}
@@ -236,7 +279,7 @@ async def firms_geojson_points() -> Dict[str, Any]:
             "emoji": "🔥",
             "confidence": p.get("confidence"),
             "brightness": p.get("brightness"),
-            "time": p.get("acq_datetime") or p.get("acq_date"),
+            "time": _stamp(_firms_epoch(p))[1],
             "raw": p,
         }
         features.append(_mk_point_feature(lon, lat, props))
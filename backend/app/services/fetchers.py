@@ -2,7 +2,8 @@ import httpx
 import os, io, csv
 import asyncio
 import random
-import httpx
+
+from .http_client import HTTP
 
 
 # Keep URLs simple & stable; you can lift to config/env later.
@@ -11,9 +12,6 @@ NWS_ALERTS_ACTIVE = "https://api.weather.gov/alerts/active"
 EONET_EVENTS_GEOJSON = "https://eonet.gsfc.nasa.gov/api/v3/events/geojson?status=open&days=7"
 DATASETS = ["VIIRS_NOAA20_NRT", "VIIRS_SNPP_NRT"]
 
-
-import httpx
-
 def _in_usa(lat: float, lon: float) -> bool:
     # CONUS
     if 24.5 <= lat <= 49.5 and -125.0 <= lon <= -66.0:
@@ -30,11 +28,13 @@ async def fetch_json_once(
     url: str,
     headers: dict,
     *,
+    source: str | None = None,
     connect_timeout: float = 3,
     read_timeout: float = 12,
 ):
     """
     Single attempt fetch; no retries, no delay.
+    Goes through the shared client; `source` names the conditional-GET cache entry.
     """
     timeout = httpx.Timeout(
         connect=connect_timeout,
@@ -42,27 +42,19 @@ async def fetch_json_once(
         write=read_timeout,
         pool=connect_timeout,
     )
-    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-        r = await client.get(url, headers=headers)
-        r.raise_for_status()
-        return r.json()
+    return await HTTP.get(source or url, url, headers=headers, timeout=timeout)
 
 async def fetch_usgs_quakes_geojson():
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(USGS_ALL_HOUR, headers={"Accept":"application/geo+json"})
-        r.raise_for_status()
-        return r.json()
+    return await HTTP.get("usgs", USGS_ALL_HOUR, headers={"Accept":"application/geo+json"}, timeout=10)
 
 async def fetch_nws_alerts_geojson():
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(NWS_ALERTS_ACTIVE, headers={"Accept":"application/geo+json"})
-        r.raise_for_status()
-        return r.json()
+    return await HTTP.get("nws", NWS_ALERTS_ACTIVE, headers={"Accept":"application/geo+json"}, timeout=10)
 
 async def fetch_eonet_events_geojson():
     return await fetch_json_once(
         EONET_EVENTS_GEOJSON,
         headers={"Accept": "application/geo+json"},
+        source="eonet",
         connect_timeout=3,
         read_timeout=12,
     )
@@ -78,9 +70,11 @@ def _get_num(d: dict, *keys):
 
 async def _fetch_firms_csv_rows(key: str, dataset: str, hours: int = 1) -> list[dict]:
     url = f"https://firms.modaps.eosdis.nasa.gov/api/area/csv/{key}/{dataset}/world/{hours}"
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(url, headers={"Accept": "text/csv", "User-Agent": "PulseMap/1.0"})
-        text = r.text or ""
+    text = await HTTP.get(
+        f"firms:{dataset}", url,
+        headers={"Accept": "text/csv"}, timeout=20,
+        parse=lambda r: r.text or "", raise_for_status=False,
+    )
 
     # Some FIRMS edges return text/plain or octet-stream; parse anyway
     # Strip BOM if present
@@ -0,0 +1,117 @@
+# backend/app/services/http_client.py
+from __future__ import annotations
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+USER_AGENT = "PulseMap/1.0"
+
+@dataclass
+class SourceStats:
+    requests: int = 0
+    not_modified: int = 0
+    errors: int = 0
+    bytes: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "hit_rate": round(self.not_modified / self.requests, 3) if self.requests else 0.0,
+            "errors": self.errors,
+            "bytes": self.bytes,
+        }
+
+@dataclass
+class _Validator:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    payload: Any = field(default=None, repr=False)
+
+class HttpPool:
+    """
+    One long-lived AsyncClient for all upstream fetches: keep-alive pooling,
+    HTTP/2 when `h2` is installed, and per-source conditional GETs so an
+    unchanged payload comes back as 304 and is never re-parsed.
+    """
+
+    def __init__(self) -> None:
+        self._client: httpx.AsyncClient | None = None
+        self._validators: Dict[str, _Validator] = {}
+        self._stats: Dict[str, SourceStats] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=importlib.util.find_spec("h2") is not None,
+                follow_redirects=True,
+                timeout=httpx.Timeout(10.0, connect=3.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(
+        self,
+        source: str,
+        url: str,
+        *,
+        headers: Optional[dict] = None,
+        timeout: float | httpx.Timeout | None = None,
+        parse: Callable[[httpx.Response], Any] = lambda r: r.json(),
+        raise_for_status: bool = True,
+    ) -> Any:
+        """
+        GET url and return parse(response). `source` keys the ETag/Last-Modified
+        validators and the counters; on 304 the previously parsed payload is returned.
+        """
+        st = self._stats.setdefault(source, SourceStats())
+        val = self._validators.get(source)
+        hdrs = dict(headers or {})
+        if val is not None:
+            if val.etag:
+                hdrs["If-None-Match"] = val.etag
+            if val.last_modified:
+                hdrs["If-Modified-Since"] = val.last_modified
+
+        kwargs: Dict[str, Any] = {"headers": hdrs}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        st.requests += 1
+        try:
+            r = await self.client.get(url, **kwargs)
+        except Exception:
+            st.errors += 1
+            raise
+        st.bytes += r.num_bytes_downloaded
+
+        if r.status_code == 304 and val is not None:
+            st.not_modified += 1
+            return val.payload
+        if raise_for_status:
+            try:
+                r.raise_for_status()
+            except httpx.HTTPStatusError:
+                st.errors += 1
+                raise
+
+        payload = parse(r)
+        etag, last_mod = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        if r.is_success and (etag or last_mod):
+            self._validators[source] = _Validator(etag=etag, last_modified=last_mod, payload=payload)
+        else:
+            self._validators.pop(source, None)
+        return payload
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: s.as_dict() for name, s in self._stats.items()}
+
+HTTP = HttpPool()
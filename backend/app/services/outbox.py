@@ -0,0 +1,140 @@
+# backend/app/services/outbox.py
+from __future__ import annotations
+import asyncio, logging, time
+from typing import Any, Dict, List, Optional
+
+from ..config.settings import settings
+from ..data import store
+from .embeddings import embed_texts
+
+log = logging.getLogger(__name__)
+
+RETRY_BASE_S = 5       # first retry delay; doubles per attempt
+RETRY_CAP_S = 600
+PURGE_AFTER_S = 86400  # done entries are kept this long for inspection
+
+def _sync_batch(rows: List[tuple]) -> None:
+    """Embed one batch of outbox rows and write it to the active vector store."""
+    from . import search
+    vecs = embed_texts([(r[4] or "User report") for r in rows])
+    if search.backend() == "tidb":
+        from ..db.tidb import ensure_schema
+        from ..data.ingest import upsert_reports
+        ensure_schema()
+        upsert_reports([r[1:] for r in rows], vecs)
+    else:
+        search.local_index().add([r[1] for r in rows], vecs)
+
+class OutboxWorker:
+    """
+    Drains report_outbox (written in the same transaction as each report) into
+    the vector store: embed a batch, upsert, mark done. A failed batch is retried
+    with exponential backoff; entries still failing after OUTBOX_MAX_ATTEMPTS are
+    parked as 'dead' until retry_dead(). New reports wake the worker right away;
+    otherwise it polls every OUTBOX_POLL_SECONDS for due retries.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.synced = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self._run(), name="report-outbox")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self) -> None:
+        """Wake the worker (callable from any thread)."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wake.set()
+        else:
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        last_purge = 0.0
+        while True:
+            try:
+                while await self.drain_once():
+                    pass
+                if time.time() - last_purge > 3600:
+                    last_purge = time.time()
+                    await asyncio.to_thread(store.outbox_purge_done, int(last_purge) - PURGE_AFTER_S)
+            except Exception:
+                log.exception("outbox worker error")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain_once(self) -> int:
+        """Process one batch of due entries; returns how many were synced."""
+        rows = await asyncio.to_thread(store.outbox_due, settings.OUTBOX_BATCH, int(time.time()))
+        if not rows:
+            return 0
+        done: List[tuple] = []
+        failed: Dict[str, List[int]] = {}
+        await self._sync(rows, done, failed)
+        for error, ids in failed.items():
+            self.failed += len(ids)
+            self.last_error = error
+            log.warning("outbox: %d reports not synced, will retry: %s", len(ids), error)
+            await asyncio.to_thread(
+                store.outbox_failed, ids, error, settings.OUTBOX_MAX_ATTEMPTS, RETRY_BASE_S, RETRY_CAP_S,
+            )
+        if done:
+            await asyncio.to_thread(store.outbox_done, [r[0] for r in done])
+            self.synced += len(done)
+        # failed entries are now due in the future; with nothing synced wait for the next wake/poll
+        return len(done)
+
+    async def _sync(self, rows: List[tuple], done: List[tuple], failed: Dict[str, List[int]]) -> None:
+        """Sync rows, bisecting a failed batch so only the rows that fail on their own are
+        charged an attempt (one oversized text must not dead-letter its whole batch).
+        Vectors embedded before a failure are cached, so retried halves reuse them."""
+        try:
+            await asyncio.to_thread(_sync_batch, rows)
+        except Exception as e:
+            if len(rows) == 1:
+                failed.setdefault(repr(e), []).append(rows[0][0])
+                return
+            mid = len(rows) // 2
+            await self._sync(rows[:mid], done, failed)
+            await self._sync(rows[mid:], done, failed)
+            return
+        done.extend(rows)
+
+    def retry_dead(self) -> int:
+        n = store.outbox_retry_dead()
+        if n:
+            self.notify()
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue": store.outbox_counts(),
+            "synced": self.synced,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
+
+OUTBOX = OutboxWorker()
@@ -1,56 +1,335 @@
 # apps/api/services/reactions.py
 from __future__ import annotations
-from typing import Dict, Set, List, Literal
-import asyncio
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Literal, Optional, Set, Tuple
+import asyncio, logging, sqlite3, threading, time, zlib
+
+from ..config.settings import settings
+from ..data.store import areport_locations
+from .events import EVENTS
+
+log = logging.getLogger(__name__)
 
 Action = Literal["verify", "clear"]
 
-# In-memory store: rid -> {"verify": set(session_id), "clear": set(session_id)}
-_REACTIONS: Dict[str, Dict[str, Set[str]]] = {}
-_LOCK = asyncio.Lock()
+DB_PATH = settings.REACTIONS_DB
+STRIPES = 64             # per-rid lock stripes
+FLUSH_BATCH = 512        # max queued reactions per write transaction
+FLUSH_WINDOW_S = 0.05    # how long the writer waits to fill a batch
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+# Durable store: one row per (rid, session) with its current action, plus
+# materialized per-rid counters so reads never aggregate.
+_DB = _connect()   # reads, on the event loop
+_WDB = _connect()  # write-behind flushes, in a worker thread
+_DB.executescript("""
+CREATE TABLE IF NOT EXISTS reactions (
+  rid TEXT NOT NULL,
+  session_id TEXT NOT NULL,
+  action TEXT NOT NULL,
+  updated_at INTEGER NOT NULL,
+  PRIMARY KEY (rid, session_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reaction_counts (
+  rid TEXT PRIMARY KEY,
+  verify_count INTEGER NOT NULL DEFAULT 0,
+  clear_count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+""")
+
+class _Counter:
+    __slots__ = ("verify", "clear", "dirty")
+
+    def __init__(self, verify: int, clear: int) -> None:
+        self.verify, self.clear, self.dirty = verify, clear, False
+
+# Hot counters (bounded LRU). Entries with unflushed changes are never evicted,
+# so a miss can always be served from the database.
+_counts: "OrderedDict[str, _Counter]" = OrderedDict()
+# (rid, session) -> action ("" = none) not yet written, and the batch being written
+_pending: Dict[Tuple[str, str], str] = {}
+_inflight: Dict[Tuple[str, str], str] = {}
+# counters with unflushed changes (held by object, so the flush never depends on the LRU)
+_dirty: Dict[str, _Counter] = {}
+_inflight_rids: Set[str] = set()
+
+_db_lock = threading.Lock()  # _DB is shared by the to_thread readers
+_locks = [asyncio.Lock() for _ in range(STRIPES)]
+_queue: "asyncio.Queue[Optional[Tuple[str, str]]]" = asyncio.Queue()  # None = stop
+_writer: Optional[asyncio.Task] = None
+
+def _stripe(rid: str) -> int:
+    return zlib.crc32(rid.encode()) % STRIPES
+
+def _lock_for(rid: str) -> asyncio.Lock:
+    return _locks[_stripe(rid)]
+
+def _evict(keep: Iterable[str] = ()) -> None:
+    """Trim the LRU; dirty, in-flight and `keep` counters stay."""
+    excess = len(_counts) - settings.REACTIONS_CACHE_SIZE
+    if excess <= 0:
+        return
+    keep = set(keep)
+    for rid in list(_counts):
+        c = _counts[rid]
+        if not c.dirty and rid not in _inflight_rids and rid not in keep:
+            del _counts[rid]
+            excess -= 1
+            if excess <= 0:
+                break
+
+def _read_counts(rids: List[str]) -> Dict[str, Tuple[int, int]]:
+    found: Dict[str, Tuple[int, int]] = {}
+    with _db_lock:
+        for i in range(0, len(rids), 900):
+            chunk = rids[i:i + 900]
+            for rid, v, c in _DB.execute(
+                "SELECT rid, verify_count, clear_count FROM reaction_counts "
+                f"WHERE rid IN ({','.join('?' * len(chunk))})", chunk,
+            ):
+                found[rid] = (v, c)
+    return found
+
+def _read_actions(rids: List[str], session_id: str) -> Dict[str, str]:
+    found: Dict[str, str] = {}
+    with _db_lock:
+        for i in range(0, len(rids), 900):
+            chunk = rids[i:i + 900]
+            found.update(_DB.execute(
+                "SELECT rid, action FROM reactions "
+                f"WHERE session_id = ? AND rid IN ({','.join('?' * len(chunk))})", [session_id, *chunk],
+            ).fetchall())
+    return found
+
+async def _counters(rids: Iterable[str]) -> Dict[str, _Counter]:
+    """Counters for rids; misses are read off the event loop. Does not evict."""
+    rids = list(dict.fromkeys(rids))
+    while missing := [rid for rid in rids if rid not in _counts]:
+        found = await asyncio.to_thread(_read_counts, missing)
+        for rid in missing:
+            if rid not in _counts:  # another caller may have loaded (and changed) it meanwhile
+                _counts[rid] = _Counter(*found.get(rid, (0, 0)))
+        # a hit from before the await may have been evicted meanwhile (clean, so the
+        # database has its value): loop to re-read it rather than re-insert an object
+        # another caller may have superseded since
+    out: Dict[str, _Counter] = {}
+    for rid in rids:  # no await since the check above: every rid is cached
+        _counts.move_to_end(rid)
+        out[rid] = _counts[rid]
+    return out
 
-def _buckets_for(rid: str) -> Dict[str, Set[str]]:
-    b = _REACTIONS.get(rid)
-    if not b:
-        b = {"verify": set(), "clear": set()}
-        _REACTIONS[rid] = b
-    return b
+def _unflushed(rid: str, session_id: str) -> Optional[str]:
+    k = (rid, session_id)
+    if k in _pending:
+        return _pending[k]
+    return _inflight.get(k)
+
+async def _actions(rids: List[str], session_id: str) -> Dict[str, str]:
+    """Current action per rid for one session ("" = none), unflushed changes first."""
+    out: Dict[str, str] = {}
+    ask: List[str] = []
+    for rid in rids:
+        a = _unflushed(rid, session_id)
+        if a is None:
+            ask.append(rid)
+        else:
+            out[rid] = a
+    if ask:
+        found = await asyncio.to_thread(_read_actions, ask, session_id)
+        for rid in ask:
+            # a change made while reading wins over the stored row
+            a = _unflushed(rid, session_id)
+            out[rid] = found.get(rid, "") if a is None else a
+    return out
+
+def _view(rid: str, c: _Counter, action: Optional[str]) -> dict:
+    out = {"rid": rid, "verify_count": c.verify, "clear_count": c.clear}
+    if action is not None:
+        out["me"] = {"verified": action == "verify", "cleared": action == "clear"}
+    return out
+
+def _flush(writes: Dict[Tuple[str, str], str], counts: Dict[str, Tuple[int, int]]) -> None:
+    now = int(time.time())
+    with _WDB:
+        _WDB.executemany(
+            "DELETE FROM reactions WHERE rid = ? AND session_id = ?",
+            [k for k, a in writes.items() if not a],
+        )
+        _WDB.executemany(
+            "INSERT INTO reactions (rid, session_id, action, updated_at) VALUES (?,?,?,?) "
+            "ON CONFLICT(rid, session_id) DO UPDATE SET action = excluded.action, updated_at = excluded.updated_at",
+            [(rid, sid, a, now) for (rid, sid), a in writes.items() if a],
+        )
+        _WDB.executemany(
+            "INSERT OR REPLACE INTO reaction_counts (rid, verify_count, clear_count) VALUES (?,?,?)",
+            [(rid, v, c) for rid, (v, c) in counts.items()],
+        )
+
+async def _flush_pending() -> None:
+    global _pending, _dirty
+    if not _pending and not _dirty:
+        return
+    # snapshot synchronously: counters and session rows describe the same moment
+    counts = {rid: (c.verify, c.clear) for rid, c in _dirty.items()}
+    writes, _pending = _pending, {}
+    dirty, _dirty = _dirty, {}
+    for c in dirty.values():
+        c.dirty = False
+    _inflight.update(writes)
+    _inflight_rids.update(dirty)
+    try:
+        await asyncio.to_thread(_flush, writes, counts)
+    except BaseException:
+        log.exception("reaction flush failed; will retry")
+        for k, a in writes.items():
+            _pending.setdefault(k, a)
+        for rid, c in dirty.items():
+            c.dirty = True
+            _dirty.setdefault(rid, c)
+        raise
+    finally:
+        for k in writes:
+            _inflight.pop(k, None)
+        _inflight_rids.difference_update(dirty)
+    _evict()
+
+async def _write_behind() -> None:
+    stop = False
+    while not stop:
+        stop = await _queue.get() is None
+        deadline = time.monotonic() + FLUSH_WINDOW_S
+        n = 1
+        while n < FLUSH_BATCH and not stop:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                stop = await asyncio.wait_for(_queue.get(), timeout) is None
+                n += 1
+            except asyncio.TimeoutError:
+                break
+        try:
+            await _flush_pending()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if stop:
+                return
+            await asyncio.sleep(1.0)
+            _queue.put_nowait(("", ""))  # wake ourselves up to retry
+
+def _ensure_writer() -> None:
+    global _writer
+    if _writer is None or _writer.done():
+        _writer = asyncio.get_running_loop().create_task(_write_behind(), name="reactions-writer")
+
+async def start() -> None:
+    _ensure_writer()
+
+async def stop() -> None:
+    """Stop the writer and flush anything still queued."""
+    global _writer
+    if _writer is not None:
+        # a sentinel rather than cancel(): the writer finishes its current flush
+        _queue.put_nowait(None)
+        await asyncio.gather(_writer, return_exceptions=True)
+        _writer = None
+    await _flush_pending()
+
+def _apply(rid: str, session_id: str, action: Action, value: bool,
+           c: _Counter, stored: str) -> Tuple[dict, bool]:
+    """
+    Set/unset one reaction on a loaded counter; caller holds rid's stripe lock.
+    `stored` is the session's action as read before; unflushed changes override it.
+    Returns (view, changed).
+    """
+    prev = _unflushed(rid, session_id)
+    if prev is None:
+        prev = stored
+    if value:
+        new = action
+    else:
+        new = "" if prev == action else prev
+    if new != prev:
+        c.verify += (new == "verify") - (prev == "verify")
+        c.clear += (new == "clear") - (prev == "clear")
+        c.dirty = True
+        _dirty[rid] = c
+        _counts[rid] = c  # c may have been evicted while this caller awaited the DB
+        _pending[(rid, session_id)] = new
+        _ensure_writer()
+        _queue.put_nowait((rid, session_id))
+    return _view(rid, c, new), new != prev
+
+async def _announce(views: Dict[str, dict]) -> None:
+    """Push new counts to viewers of the reports' locations (skipped when nobody listens)."""
+    if not views or not EVENTS.active:
+        return
+    for rid, (lat, lon) in (await areport_locations(list(views))).items():
+        v = views[rid]
+        EVENTS.publish("reaction", lat, lon,
+                       {"rid": rid, "verify_count": v["verify_count"], "clear_count": v["clear_count"]})
 
 async def react(rid: str, session_id: str, action: Action, value: bool):
-    async with _LOCK:
-        b = _buckets_for(rid)
-        if action == "verify":
-            if value:
-                b["verify"].add(session_id); b["clear"].discard(session_id)
-            else:
-                b["verify"].discard(session_id)
-        elif action == "clear":
-            if value:
-                b["clear"].add(session_id); b["verify"].discard(session_id)
-            else:
-                b["clear"].discard(session_id)
-        return {
-            "rid": rid,
-            "verify_count": len(b["verify"]),
-            "clear_count": len(b["clear"]),
-            "me": {
-                "verified": session_id in b["verify"],
-                "cleared": session_id in b["clear"],
-            },
-        }
-
-async def get_many(ids: List[str], session_id: str):
-    out: Dict[str, dict] = {}
-    async with _LOCK:
-        for rid in ids:
-            b = _buckets_for(rid)
-            out[rid] = {
-                "rid": rid,
-                "verify_count": len(b["verify"]),
-                "clear_count": len(b["clear"]),
-                "me": {
-                    "verified": session_id in b["verify"],
-                    "cleared": session_id in b["clear"],
-                },
-            }
-    return out
\ No newline at end of file
+    async with _lock_for(rid):
+        # the DB reads await, so the stripe lock keeps same-rid reactions from interleaving
+        counters = await _counters([rid])
+        stored = await _actions([rid], session_id)
+        out, changed = _apply(rid, session_id, action, value, counters[rid], stored[rid])
+        _evict(keep=[rid])
+    if changed:
+        await _announce({rid: out})
+    return out
+
+async def react_many(session_id: str, items: List[Tuple[str, Action, bool]]) -> Dict[str, dict]:
+    """
+    Apply several (rid, action, value) reactions for one session under their stripe
+    locks (taken once, in a fixed order); they are flushed together by the writer.
+    """
+    stripes = sorted({_stripe(rid) for rid, _, _ in items})  # fixed order: no lock-order deadlocks
+    held: List[asyncio.Lock] = []
+    try:
+        for i in stripes:
+            await _locks[i].acquire()
+            held.append(_locks[i])
+        rids = list(dict.fromkeys(rid for rid, _, _ in items))
+        counters = await _counters(rids)
+        stored = await _actions(rids, session_id)
+        out: Dict[str, dict] = {}
+        changed: Set[str] = set()
+        for rid, action, value in items:
+            out[rid], ch = _apply(rid, session_id, action, value, counters[rid], stored[rid])
+            if ch:
+                changed.add(rid)
+        _evict(keep=rids)
+    finally:
+        for lock in reversed(held):
+            lock.release()
+    await _announce({rid: out[rid] for rid in changed})
+    return out
+
+async def get_many(ids: List[str], session_id: Optional[str] = None):
+    counters = await _counters(ids)
+    actions = await _actions(ids, session_id) if session_id else {}
+    out = {rid: _view(rid, counters[rid], actions.get(rid) if session_id else None) for rid in ids}
+    _evict()
+    return out
+
+async def attach(items: List[dict], session_id: Optional[str] = None) -> None:
+    """
+    Join verify_count/clear_count (and `me` when session_id is given) into each dict
+    that carries a report "rid"; other items are left alone.
+    """
+    rids = list({str(it["rid"]) for it in items if it.get("rid")})
+    if not rids:
+        return
+    views = await get_many(rids, session_id)
+    for it in items:
+        if it.get("rid"):
+            v = views[str(it["rid"])]
+            it.update({k: v[k] for k in ("verify_count", "clear_count", "me") if k in v})
@@ -1,9 +1,45 @@
+import logging
 from typing import Dict, Any, List, Optional
-from ..data.store import add_report as _add, find_reports_near as _find
+from ..data.store import (
+    add_report as _add, find_reports_near as _find, reports_missing_geoid, assign_geoids,
+)
+from . import tracts
+from .events import EVENTS
+from .outbox import OUTBOX
+
+log = logging.getLogger(__name__)
+
+def _tract_for(lat: float, lon: float) -> Optional[str]:
+    try:
+        return tracts.geoid_for_point(lat, lon)
+    except Exception as e:  # tracts unavailable: store the report without a tract
+        log.warning("tract lookup failed: %r", e)
+        return None
 
 def add_report(lat: float, lon: float, text: str, props: dict | None = None) -> Dict[str, Any]:
-    return _add(lat, lon, text, props)
+    # never load (or wait for the warm-up) on the write path: until tracts are loaded
+    # reports are stored without one and the load's backfill assigns it
+    loaded = tracts.loaded()
+    feat = _add(lat, lon, text, props, geoid=_tract_for(lat, lon) if loaded else None)
+    if not loaded and tracts.loaded():
+        # loaded meanwhile: that backfill may have run before this report committed
+        try:
+            backfill_report_tracts()
+        except Exception as e:
+            log.warning("tract backfill failed: %r", e)
+    EVENTS.publish_threadsafe("report", float(lat), float(lon), feat)
+    OUTBOX.notify()  # the outbox row was written with the report; embedding happens off this path
+    return feat
 
 def find_reports_near(lat: float, lon: float, radius_km: float, limit: int,
                       max_age_hours: Optional[int] = None) -> List[Dict[str, Any]]:
     return _find(lat, lon, radius_km, limit, max_age_hours=max_age_hours)
+
+def backfill_report_tracts(batch: int = 5000) -> int:
+    """Assign tracts to reports stored before tract tracking (or while tracts were unavailable)."""
+    done = 0
+    while rows := reports_missing_geoid(batch):
+        ids, lats, lons = zip(*rows)
+        assign_geoids(list(zip(ids, tracts.geoids_for_points(list(lats), list(lons)))))
+        done += len(rows)
+    return done
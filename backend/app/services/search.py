@@ -0,0 +1,282 @@
+# backend/app/services/search.py
+from __future__ import annotations
+import base64, json, logging, math, threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, text
+
+from ..config.settings import settings
+from ..data import store
+from ..data.geo import EARTH_RADIUS_KM, bbox_around, haversine_km_np, split_antimeridian
+from ..data.vector_index import LocalVectorIndex
+from ..data.vectors import to_literal
+from ..db import tidb
+from .embeddings import EMBED_DIM, embed_text, embed_texts
+
+log = logging.getLogger(__name__)
+
+BBox = Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+
+MAX_CELLS = 1024     # beyond this the TiDB geo prefilter is a plain lat/lon range
+MAX_ANN_OFFSET = 1000
+SYNC_BATCH = 256     # reports embedded per step when filling the local index
+
+@dataclass
+class Filters:
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    radius_km: Optional[float] = None
+    bbox: Optional[BBox] = None
+    since: Optional[datetime] = None
+    category: Optional[str] = None
+
+    @property
+    def near(self) -> bool:
+        return self.lat is not None and self.lon is not None
+
+    def __bool__(self) -> bool:
+        return self.near or self.bbox is not None or self.since is not None or bool(self.category)
+
+def backend() -> str:
+    """"tidb" or "local" (VECTOR_BACKEND=auto picks TiDB when TIDB_URL is set)."""
+    if settings.VECTOR_BACKEND != "auto":
+        return settings.VECTOR_BACKEND
+    return "tidb" if tidb.configured() else "local"
+
+def encode_cursor(c: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(c, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(s: str) -> Dict[str, Any]:
+    """{"o": offset} or {"d": distance, "id": report id}; ValueError on anything else."""
+    try:
+        c = json.loads(base64.urlsafe_b64decode(s + "=" * (-len(s) % 4)))
+    except Exception as e:
+        raise ValueError("cursor is not base64 JSON") from e
+    if not isinstance(c, dict):
+        raise ValueError("cursor must be an object")
+    if set(c) == {"o"} and _is_int(c["o"]) and c["o"] >= 0:
+        return {"o": c["o"]}
+    if (set(c) == {"d", "id"} and _is_int(c["id"]) and not isinstance(c["d"], bool)
+            and isinstance(c["d"], (int, float)) and math.isfinite(c["d"])):
+        return {"d": float(c["d"]), "id": c["id"]}
+    raise ValueError("unrecognized cursor")
+
+def _is_int(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+def search_reports(
+    q: str,
+    k: int = 10,
+    *,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    bbox: Optional[BBox] = None,
+    since: Optional[datetime] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    qvec: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Reports most similar to q, nearest (cosine distance) first, from TiDB or the
+    local index. With no filters the ANN index answers the top-k directly. With
+    geo/time/category filters indexed columns narrow the rows first and the exact
+    distance is computed only on those, so filtered results are never lost to a
+    global top-k. Pages continue from `next_cursor`. Pass `qvec` when q is
+    already embedded (the router embeds via the async batcher).
+    """
+    f = Filters(lat, lon, radius_km, bbox, since, category)
+    cur = decode_cursor(cursor) if cursor else {}
+    if qvec is None:
+        qvec = embed_text(q)
+    run = _search_tidb if backend() == "tidb" else _search_local
+    feats, nxt = run(qvec, k, f, cur)
+    return {"features": feats, "next_cursor": encode_cursor(nxt) if nxt else None}
+
+def _keyset_next(page: List[Tuple[float, int]], k: int) -> Optional[Dict[str, Any]]:
+    return {"d": page[k - 1][0], "id": page[k - 1][1]} if len(page) > k else None
+
+# ---- TiDB ----
+
+# great-circle km from (:lat, :lon) to the row, evaluated only on prefiltered rows
+_HAVERSINE_SQL = (
+    f"2 * {EARTH_RADIUS_KM} * ASIN(SQRT("
+    "POW(SIN(RADIANS(lat - :lat) / 2), 2) + "
+    "COS(RADIANS(:lat)) * COS(RADIANS(lat)) * POW(SIN(RADIANS(lon - :lon) / 2), 2)))"
+)
+
+def _utc_naive(dt: datetime) -> datetime:
+    """created_at holds UTC and pymysql drops tz offsets: convert, don't strip.
+    A naive datetime is taken as UTC."""
+    return dt.replace(tzinfo=None) if dt.tzinfo is None else dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _tidb_feature(row, with_km: bool) -> Dict[str, Any]:
+    rid, lat, lon, txt, props, created, dist = row[:7]
+    p = {"id": str(rid), "rid": str(rid), "text": txt, "reported_at": str(created),
+         **(json.loads(props or "{}")), "distance": float(dist)}
+    if with_km:
+        p["distance_km"] = round(float(row[7]), 3)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [float(lon), float(lat)]},
+        "properties": p,
+    }
+
+def _search_tidb(qvec: np.ndarray, k: int, f: Filters, cur: Dict[str, Any]):
+    tidb.ensure_schema()
+    params: Dict[str, Any] = {"qvec": to_literal(qvec)}
+    where: List[str] = []
+    binds = []
+
+    boxes: List[BBox] = []
+    if f.near:
+        min_lat, max_lat, min_lon, max_lon = bbox_around(f.lat, f.lon, f.radius_km)
+        boxes.append((min_lon, min_lat, max_lon, max_lat))
+        where.append(f"{_HAVERSINE_SQL} <= :radius_km")
+        params.update(lat=f.lat, lon=f.lon, radius_km=f.radius_km)
+    if f.bbox is not None:
+        boxes.append(f.bbox)
+    for i, box in enumerate(boxes):
+        cells = tidb.cells_for_bbox(box, MAX_CELLS)
+        if cells is not None:
+            where.append(f"cell IN :cells{i}")
+            params[f"cells{i}"] = cells
+            binds.append(bindparam(f"cells{i}", expanding=True))
+        min_lon_, min_lat_, max_lon_, max_lat_ = box
+        where.append(f"lat BETWEEN :min_lat{i} AND :max_lat{i}")
+        params.update({f"min_lat{i}": min_lat_, f"max_lat{i}": max_lat_})
+        if min_lon_ <= max_lon_:
+            where.append(f"lon BETWEEN :min_lon{i} AND :max_lon{i}")
+        else:  # across the antimeridian
+            where.append(f"(lon >= :min_lon{i} OR lon <= :max_lon{i})")
+        params.update({f"min_lon{i}": min_lon_, f"max_lon{i}": max_lon_})
+    if f.since is not None:
+        where.append("created_at >= :since")
+        params["since"] = _utc_naive(f.since)
+    if f.category:
+        where.append("category = :category")
+        params["category"] = f.category
+
+    km_col = f", {_HAVERSINE_SQL} AS km" if f.near else ""
+    cols = f"id, lat, lon, text, props, created_at, VEC_COSINE_DISTANCE(embedding, :qvec) AS dist{km_col}"
+
+    if not where:
+        # ANN: the vector index only serves a bare ORDER BY distance LIMIT, so page by offset
+        offset = min(int(cur.get("o", 0)), MAX_ANN_OFFSET)
+        sql = text(f"SELECT {cols} FROM reports "
+                   f"ORDER BY VEC_COSINE_DISTANCE(embedding, :qvec) LIMIT :n")
+        params["n"] = offset + k + 1
+        with tidb.get_engine().begin() as cx:
+            rows = cx.execute(sql, params).fetchall()[offset:]
+        nxt = {"o": offset + k} if len(rows) > k and offset + k <= MAX_ANN_OFFSET else None
+    else:
+        # exact: keyset on (dist, id) over the prefiltered rows
+        inner = f"SELECT {cols} FROM reports WHERE {' AND '.join(where)}"
+        after = ""
+        if "d" in cur:
+            after = "WHERE t.dist > :cd OR (t.dist = :cd AND t.id > :cid)"
+            params.update(cd=float(cur["d"]), cid=int(cur["id"]))
+        sql = text(f"SELECT * FROM ({inner}) t {after} ORDER BY t.dist, t.id LIMIT :n")
+        if binds:
+            sql = sql.bindparams(*binds)
+        params["n"] = k + 1
+        with tidb.get_engine().begin() as cx:
+            rows = cx.execute(sql, params).fetchall()
+        nxt = _keyset_next([(float(r[6]), int(r[0])) for r in rows], k)
+    return [_tidb_feature(r, f.near) for r in rows[:k]], nxt
+
+# ---- local (SQLite reports + memory-mapped vectors) ----
+
+_local: Optional[LocalVectorIndex] = None
+
+def local_index() -> LocalVectorIndex:
+    global _local
+    if _local is None:
+        _local = LocalVectorIndex(settings.DATA_DIR / "vectors" / "reports", EMBED_DIM,
+                                  ann_threshold=settings.VECTOR_ANN_THRESHOLD)
+    return _local
+
+def _local_candidates(f: Filters) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Report ids passing the filters (via SQLite indexes), plus km from (lat, lon) when near."""
+    box = f.bbox
+    if f.near:
+        min_lat, max_lat, min_lon, max_lon = bbox_around(f.lat, f.lon, f.radius_km)
+        box = (min_lon, min_lat, max_lon, max_lat)
+    since_ts = int(f.since.replace(tzinfo=f.since.tzinfo or timezone.utc).timestamp()) if f.since else None
+    rows = store.filter_reports(box, since_ts, f.category)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), None
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    lats = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+    lons = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+    keep = np.ones(len(ids), dtype=bool)
+    km = None
+    if f.near:
+        km = haversine_km_np(f.lat, f.lon, lats, lons)
+        keep &= km <= f.radius_km
+        if f.bbox is not None:  # both given: the user's bbox narrows the circle further
+            inside = np.zeros(len(ids), dtype=bool)
+            for min_lon, min_lat, max_lon, max_lat in split_antimeridian(f.bbox):
+                inside |= (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+            keep &= inside
+    return ids[keep], (km[keep] if km is not None else None)
+
+def _search_local(qvec: np.ndarray, k: int, f: Filters, cur: Dict[str, Any]):
+    idx = local_index()
+    km_by_id: Dict[int, float] = {}
+    if not f:
+        offset = min(int(cur.get("o", 0)), MAX_ANN_OFFSET)
+        ids, dists = idx.top(qvec, offset + k + 1)
+        page = list(zip(dists[offset:].tolist(), ids[offset:].tolist()))
+        nxt = {"o": offset + k} if len(page) > k and offset + k <= MAX_ANN_OFFSET else None
+    else:
+        ids, km = _local_candidates(f)
+        rows = idx.lookup(ids)
+        indexed = rows >= 0
+        ids, rows = ids[indexed], rows[indexed]
+        if km is not None:
+            km_by_id = dict(zip(ids.tolist(), km[indexed].tolist()))
+        # rounded so a cursor's distance compares equal to the same row on the next page
+        d = np.round(idx.distances(qvec, rows), 7)
+        if "d" in cur:
+            cd, cid = float(cur["d"]), int(cur["id"])
+            after = (d > cd) | ((d == cd) & (ids > cid))
+            ids, d = ids[after], d[after]
+        n = min(k + 1, len(d))
+        part = np.argpartition(d, n - 1)[:n] if n < len(d) else np.arange(len(d))
+        part = part[np.lexsort((ids[part], d[part]))]
+        page = list(zip(d[part].tolist(), ids[part].tolist()))
+        nxt = _keyset_next(page, k)
+    feats_by_id = store.reports_by_ids([rid for _, rid in page[:k]])
+    feats = []
+    for dist, rid in page[:k]:
+        feat = feats_by_id.get(rid)
+        if feat is None:  # deleted since it was indexed
+            continue
+        feat["properties"]["distance"] = dist
+        if rid in km_by_id:
+            feat["properties"]["distance_km"] = round(km_by_id[rid], 3)
+        feats.append(feat)
+    return feats, nxt
+
+def save_local_index() -> None:
+    if _local is not None:
+        _local.save()
+
+def sync_local_index(stop: Optional[threading.Event] = None) -> int:
+    """Embed and index every stored report missing from the local index (e.g. from before
+    the outbox existed), until `stop` is set; returns rows added. New reports arrive via
+    services/outbox.py."""
+    idx = local_index()
+    have = set(idx.indexed_ids().tolist())
+    added, last = 0, 0
+    while not (stop is not None and stop.is_set()) and (batch := store.report_texts(last, SYNC_BATCH)):
+        last = batch[-1][0]
+        todo = [(rid, txt) for rid, txt in batch if rid not in have]
+        if todo:
+            vecs = embed_texts([txt or "User report" for _, txt in todo])
+            added += idx.add([rid for rid, _ in todo], vecs)
+    return added
@@ -0,0 +1,130 @@
+# backend/app/services/tract_tiles.py
+from __future__ import annotations
+import math, os, logging, threading
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import shapely
+import mapbox_vector_tile
+
+from ..config.settings import settings
+from . import tracts
+
+log = logging.getLogger(__name__)
+
+LAYER = "tracts"
+EXTENT = 4096              # tile units per side
+BUFFER = 64                # tile units of overlap so strokes don't seam at tile edges
+MIN_ZOOM, MAX_ZOOM = 3, 16 # below MIN_ZOOM a tile would hold most of the country
+ORIGIN = 20037508.342789244
+US_BOUNDS = (-170.0, 18.0, -66.0, 72.0)  # (min_lon, min_lat, max_lon, max_lat)
+
+TILES_DIR = settings.DATA_DIR / "tiles" / LAYER
+
+def _mercator(coords: np.ndarray) -> np.ndarray:
+    """lon/lat (EPSG:4326) -> Web Mercator metres (EPSG:3857), vectorized."""
+    lon = coords[:, 0]
+    lat = np.clip(coords[:, 1], -85.05112878, 85.05112878)
+    x = np.radians(lon) * 6378137.0
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * 6378137.0
+    return np.column_stack([x, y])
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(minx, miny, maxx, maxy) of an XYZ tile in Web Mercator metres."""
+    span = 2 * ORIGIN / (1 << z)
+    minx = -ORIGIN + x * span
+    maxy = ORIGIN - y * span
+    return minx, maxy - span, minx + span, maxy
+
+def _tile_bounds_lonlat(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    n = 1 << z
+    def lat(yy: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yy / n))))
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+def tiles_covering(bounds: Tuple[float, float, float, float], z: int) -> Iterator[Tuple[int, int]]:
+    min_lon, min_lat, max_lon, max_lat = bounds
+    n = 1 << z
+    def tx(lon: float) -> int:
+        return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+    def ty(lat: float) -> int:
+        lat = max(min(lat, 85.05112878), -85.05112878)
+        r = math.radians(lat)
+        return min(n - 1, max(0, int((1 - math.asinh(math.tan(r)) / math.pi) / 2 * n)))
+    for x in range(tx(min_lon), tx(max_lon) + 1):
+        for y in range(ty(max_lat), ty(min_lat) + 1):
+            yield x, y
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+def _col(df, name: str) -> list:
+    return df[name].tolist() if name in df.columns else [None] * len(df)
+
+def render_tile(z: int, x: int, y: int) -> bytes:
+    """Clip, simplify and encode the tracts under one tile as a Mapbox Vector Tile."""
+    if z < MIN_ZOOM:
+        return mapbox_vector_tile.encode([{"name": LAYER, "features": []}])
+    tracts._ensure_loaded()
+    gdf = tracts._gdf
+    assert gdf is not None
+
+    minx, miny, maxx, maxy = tile_bounds(z, x, y)
+    pad = (maxx - minx) * BUFFER / EXTENT
+    w, s, e, n = _tile_bounds_lonlat(z, x, y)
+    pad_deg = (e - w) * BUFFER / EXTENT
+    idx = gdf.sindex.query(shapely.box(w - pad_deg, s - pad_deg, e + pad_deg, n + pad_deg),
+                           predicate="intersects")
+    features = []
+    if len(idx):
+        geoms = shapely.transform(gdf.geometry.values[idx], _mercator)
+        geoms = shapely.clip_by_rect(geoms, minx - pad, miny - pad, maxx + pad, maxy + pad)
+        # one tile unit is the smallest detail the client can draw at this zoom
+        geoms = shapely.simplify(geoms, (maxx - minx) / EXTENT, preserve_topology=True)
+        sub = gdf.iloc[idx]
+        geoid, name, namelsad = (_col(sub, c) for c in ("GEOID", "NAME", "NAMELSAD"))
+        for i, g in enumerate(geoms):
+            if g is None or g.is_empty:
+                continue
+            features.append({
+                "geometry": g,
+                "properties": {"geoid": geoid[i], "name": name[i], "namelsad": namelsad[i]},
+            })
+    return mapbox_vector_tile.encode(
+        [{"name": LAYER, "features": features}],
+        default_options={"quantize_bounds": (minx, miny, maxx, maxy), "extents": EXTENT},
+    )
+
+def _tile_path(z: int, x: int, y: int) -> Path:
+    # keyed by the shapefile hash so a new tract vintage never serves old tiles
+    return TILES_DIR / tracts.cache_key() / str(z) / str(x) / f"{y}.mvt"
+
+def get_tile(z: int, x: int, y: int) -> bytes:
+    """Tile bytes from the disk cache, rendering and storing them on first request."""
+    path = _tile_path(z, x, y)
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    data = render_tile(z, x, y)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)  # atomic: concurrent readers never see a partial tile
+    return data
+
+def preseed(max_zoom: int, bounds: Tuple[float, float, float, float] = US_BOUNDS,
+            stop: Optional[threading.Event] = None) -> int:
+    """Render every missing tile over `bounds` from MIN_ZOOM to max_zoom (until `stop` is
+    set); returns tiles written."""
+    written = 0
+    for z in range(MIN_ZOOM, min(max_zoom, MAX_ZOOM) + 1):
+        for x, y in tiles_covering(bounds, z):
+            if stop is not None and stop.is_set():
+                return written
+            if not _tile_path(z, x, y).exists():
+                get_tile(z, x, y)
+                written += 1
+        log.info("tract tiles: zoom %d seeded", z)
+    return written
@@ -1,62 +1,232 @@
 # apps/api/services/tracts.py
 from __future__ import annotations
+import hashlib, json, logging, math, threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Tuple, List
+from typing import Any, List, Tuple
+import numpy as np
+import shapely
 import geopandas as gpd
-from shapely.geometry import box, mapping
+from shapely.geometry import box
+
+from ..config.settings import settings
+
+log = logging.getLogger(__name__)
 
 BASE = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE / "census" 
 SHAPEFILE = DATA_DIR / "cb_2024_us_tract_500k.shp"
+CACHE_DIR = settings.DATA_DIR / "cache"
+
+# Bump when the preprocessing below changes so stale caches are ignored
+PREP_VERSION = 1
+SIMPLIFY_TOLERANCE = 0.0005
+KEEP_COLUMNS = ("GEOID", "STATEFP", "NAME", "NAMELSAD")
+MIN_SNAP_DEG = 1 / 256  # finest bbox snapping grid (~400 m)
 
 _gdf: gpd.GeoDataFrame | None = None
+_lock = threading.Lock()
+_key: str | None = None
 
-def _ensure_loaded() -> None:
-    global _gdf
-    if _gdf is not None:
-        return
-    if not SHAPEFILE.exists():
-        raise FileNotFoundError(f"Tracts shapefile not found at {SHAPEFILE}")
+def cache_key() -> str:
+    """Hash of the shapefile (+ sidecars) and preprocessing settings; names the derived caches."""
+    global _key
+    if _key is None:
+        h = hashlib.sha256(f"v{PREP_VERSION}:{SIMPLIFY_TOLERANCE}".encode())
+        for ext in (".shp", ".shx", ".dbf", ".prj"):
+            part = SHAPEFILE.with_suffix(ext)
+            if part.exists():
+                with part.open("rb") as fh:
+                    for chunk in iter(lambda: fh.read(1 << 20), b""):
+                        h.update(chunk)
+        _key = h.hexdigest()[:16]
+    return _key
 
+def cache_path() -> Path:
+    return CACHE_DIR / f"tracts-{cache_key()}.parquet"
+
+def _prepare() -> gpd.GeoDataFrame:
+    """Read the shapefile, reproject to EPSG:4326, prune columns and simplify."""
     gdf = gpd.read_file(SHAPEFILE).to_crs(epsg=4326)
-    keep = [c for c in ("GEOID", "STATEFP", "NAME", "NAMELSAD") if c in gdf.columns]
+    keep = [c for c in KEEP_COLUMNS if c in gdf.columns]
     gdf = gdf[keep + ["geometry"]]
 
     # optional: simplify a bit to reduce payload size
-    gdf["geometry"] = gdf["geometry"].simplify(0.0005, preserve_topology=True)
+    gdf["geometry"] = gdf["geometry"].simplify(SIMPLIFY_TOLERANCE, preserve_topology=True)
+    return gdf.reset_index(drop=True)
+
+def build_cache() -> Path:
+    """Preprocess the shapefile into a GeoParquet (WKB) cache keyed by the shapefile hash."""
+    if not SHAPEFILE.exists():
+        raise FileNotFoundError(f"Tracts shapefile not found at {SHAPEFILE}")
+    path = cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    _prepare().to_parquet(tmp, index=False)
+    tmp.replace(path)
+    return path
+
+def _ensure_loaded() -> None:
+    if _gdf is not None:
+        return
+    if _load():
+        _backfill()
+
+def _backfill() -> None:
+    """Assign tracts to reports stored while they were not loaded (add_report skips the lookup)."""
+    from .reports import backfill_report_tracts
+    try:
+        n = backfill_report_tracts()
+        if n:
+            log.info("assigned tracts to %d reports", n)
+    except Exception:
+        log.exception("tract backfill failed")
+
+def _load() -> bool:
+    """Load tracts + spatial index; True if this call did the loading."""
+    global _gdf
+    with _lock:  # concurrent first requests wait for one load instead of each parsing
+        if _gdf is not None:
+            return False
+        if not SHAPEFILE.exists():
+            raise FileNotFoundError(f"Tracts shapefile not found at {SHAPEFILE}")
+
+        path = cache_path()
+        if not path.exists():
+            try:
+                build_cache()
+            except Exception as e:
+                log.warning("tract cache build failed, using shapefile directly: %r", e)
+        if path.exists():
+            gdf = gpd.read_parquet(path, memory_map=True)
+        else:
+            gdf = _prepare()
 
-    # build spatial index lazily via gdf.sindex
-    _gdf = gdf
+        gdf.sindex  # build the STRtree now, not on the first query
+        _gdf = gdf
+        _responses.clear()
+        return True
 
-def get_tracts_by_bbox(bbox: Tuple[float, float, float, float]) -> Dict[str, Any]:
+def loaded() -> bool:
+    return _gdf is not None
+
+def warm() -> None:
+    """Load tracts + spatial index (and backfill report tracts) off the request path (called at startup)."""
+    try:
+        _ensure_loaded()
+    except Exception as e:
+        log.warning("tracts not loaded: %r", e)
+
+class _SizedLRU:
+    """Thread-safe LRU bounded by the summed byte size of its values."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Any, Tuple[Any, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None:
+                return None
+            self._items.move_to_end(key)
+            return hit[0]
+
+    def put(self, key: Any, val: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._items[key] = (val, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, ev_size) = self._items.popitem(last=False)
+                self._size -= ev_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+# snapped bbox -> (geoids, feature heads); a head is one Feature's JSON up to and
+# including its base properties, left open so per-request stats can be appended
+_responses = _SizedLRU(settings.TRACTS_CACHE_MAX_BYTES)
+
+def _snap_bbox(bbox: Tuple[float, float, float, float]) -> Tuple[float, Tuple[int, int, int, int]]:
+    """
+    Snap bbox outward to a power-of-two degree grid sized to the bbox (~1/8 of its span),
+    so slightly different pans over the same area share one cache key.
+    """
+    minx, miny, maxx, maxy = bbox
+    span = max(maxx - minx, maxy - miny, 1e-6)
+    cell = max(MIN_SNAP_DEG, 2.0 ** math.floor(math.log2(span / 8)))
+    return cell, (math.floor(minx / cell), math.floor(miny / cell),
+                  math.ceil(maxx / cell), math.ceil(maxy / cell))
+
+def _feature_heads(idx: np.ndarray) -> Tuple[List[Any], List[str]]:
+    """GEOIDs and open Feature JSON heads for rows idx, geometry via shapely's bulk to_geojson."""
+    assert _gdf is not None
+    sub = _gdf.take(idx)
+    geoms = shapely.to_geojson(sub.geometry.values)
+    cols = [sub[c].tolist() if c in sub.columns else [None] * len(sub) for c in KEEP_COLUMNS]
+    heads = [
+        '{"type":"Feature","geometry":' + g + ',"properties":'
+        + json.dumps({"geoid": geoid, "statefp": statefp, "name": name, "namelsad": namelsad},
+                     separators=(",", ":"))[:-1]
+        for g, geoid, statefp, name, namelsad in zip(geoms, *cols)
+    ]
+    return cols[0], heads
+
+_NO_REPORTS = {"report_count": 0, "sev_low": 0, "sev_medium": 0, "sev_high": 0,
+               "max_severity": None, "last_report_ts": None}
+
+def get_tracts_by_bbox(bbox: Tuple[float, float, float, float], with_stats: bool = False) -> bytes:
     """
     bbox = (min_lon, min_lat, max_lon, max_lat)
-    Returns GeoJSON FeatureCollection of tracts intersecting bbox.
+    Returns a serialized GeoJSON FeatureCollection of tracts intersecting bbox, snapped
+    outward to the cache grid (so a few tracts just outside bbox may be included).
+    with_stats adds each tract's report rollup (count, severity counts, max severity).
     """
     _ensure_loaded()
     assert _gdf is not None
 
-    minx, miny, maxx, maxy = bbox
-    qpoly = box(minx, miny, maxx, maxy)
-
-    # Use GeoPandas spatial index to get row indices (no identity headaches)
-    sindex = _gdf.sindex  # builds on first access
-    idx = list(sindex.query(qpoly, predicate="intersects"))
-
-    feats: List[Dict[str, Any]] = []
-    for i in idx:
-        geom = _gdf.geometry.iat[i]
-        if not geom.intersects(qpoly):
-            continue
-        row = _gdf.iloc[i]
-        props = { "geoid": row.get("GEOID"),
-                  "statefp": row.get("STATEFP"),
-                  "name": row.get("NAME"),
-                  "namelsad": row.get("NAMELSAD") }
-        feats.append({
-            "type": "Feature",
-            "geometry": mapping(geom),  # or mapping(geom.intersection(qpoly)) to clip
-            "properties": props
-        })
-
-    return {"type": "FeatureCollection", "features": feats}
+    cell, key = _snap_bbox(bbox)
+    hit = _responses.get((cell, key))
+    if hit is None:
+        minx, miny, maxx, maxy = (k * cell for k in key)
+        # predicate="intersects" is exact, so no per-geometry re-check is needed
+        idx = np.sort(_gdf.sindex.query(box(minx, miny, maxx, maxy), predicate="intersects"))
+        hit = _feature_heads(idx)
+        _responses.put((cell, key), hit, sum(len(h) for h in hit[1]))
+    geoids, heads = hit
+
+    if with_stats:
+        from ..data.store import get_tract_stats
+        stats = get_tract_stats(geoids)
+        feats = [h + "," + json.dumps(stats.get(g, _NO_REPORTS), separators=(",", ":"))[1:] + "}"
+                 for g, h in zip(geoids, heads)]
+    else:
+        feats = [h + "}}" for h in heads]
+    return ('{"type":"FeatureCollection","features":[' + ",".join(feats) + "]}").encode()
+
+def geoids_for_points(lats: List[float], lons: List[float]) -> List[str | None]:
+    """Tract GEOID containing each (lat, lon), via one bulk STRtree query."""
+    _ensure_loaded()
+    assert _gdf is not None
+    out: List[str | None] = [None] * len(lats)
+    if not out or "GEOID" not in _gdf.columns:
+        return out
+    pts = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    src, hits = _gdf.sindex.query(pts, predicate="intersects")
+    geoid_col = _gdf["GEOID"].to_numpy()
+    for i, j in zip(src.tolist(), hits.tolist()):
+        if out[i] is None:
+            out[i] = geoid_col[j]
+    return out
+
+def geoid_for_point(lat: float, lon: float) -> str | None:
+    return geoids_for_points([lat], [lon])[0]
@@ -16,6 +16,7 @@ class Update(BaseModel):
     title: str
     emoji: str
     time: Optional[str]
+    ts: Optional[int] = None   # epoch seconds, parsed once at ingest
     lat: float
     lon: float
     severity: Optional[str] = None
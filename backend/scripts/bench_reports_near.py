@@ -0,0 +1,87 @@
+from __future__ import annotations
+import os, sys, time, random, argparse, tempfile, statistics
+from datetime import datetime, timezone
+from pathlib import Path
+
+# --- Config ---
+QUERIES     = 200      # find_reports_near calls per size
+RADIUS_KM   = 40.0     # same as settings.DEFAULT_RADIUS_KM
+INSERT_ROWS = 50_000   # rows per executemany batch
+
+def get_args():
+    ap = argparse.ArgumentParser("Benchmark find_reports_near on synthetic report tables")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--queries", type=int, default=QUERIES)
+    ap.add_argument("--radius-km", type=float, default=RADIUS_KM)
+    ap.add_argument("--check", action="store_true",
+                    help="Compare every result against a full-table haversine scan (slow at 1M)")
+    return ap.parse_args()
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    # Roughly CONUS, where the app's feeds and users live
+    return rng.uniform(24.5, 49.5), rng.uniform(-125.0, -66.0)
+
+def load(store, n: int, rng: random.Random) -> None:
+    now_dt = datetime.now(timezone.utc)
+    now, now_ts = now_dt.isoformat(), int(now_dt.timestamp())
+
+    def clear(cx) -> None:
+        cx.execute("DELETE FROM reports")
+        cx.execute("DELETE FROM reports_rtree")
+    store.ENGINE.write(clear)
+    for start in range(0, n, INSERT_ROWS):
+        rows = []
+        for _ in range(min(INSERT_ROWS, n - start)):
+            lat, lon = random_point(rng)
+            rows.append((lat, lon, "bench report", "{}", now, now_ts))
+        store.ENGINE.write(lambda cx: cx.executemany(
+            "INSERT INTO reports (lat, lon, text, props_json, created_at, created_ts) VALUES (?,?,?,?,?,?)",
+            rows,
+        ))
+    store._sync_spatial_index()
+
+def brute_force(store, lat: float, lon: float, radius_km: float, limit: int) -> list[str]:
+    from backend.app.data.geo import haversine_km
+    cand = []
+    for rid, lat2, lon2 in store.ENGINE.reader().execute("SELECT id, lat, lon FROM reports"):
+        d = haversine_km((lat, lon), (lat2, lon2))
+        if d <= radius_km:
+            cand.append((d, str(rid)))
+    cand.sort()
+    return [rid for _, rid in cand[:max(1, limit)]]
+
+def main():
+    args = get_args()
+    tmp = Path(tempfile.mkdtemp(prefix="pulsemaps-bench-"))
+    # settings/store bind the DB path at import time
+    os.environ["DATA_DIR"] = str(tmp)
+    os.environ["REPORTS_DB"] = str(tmp / "bench_reports.db")
+    from backend.app.data import store
+
+    rng = random.Random(42)
+    print(f"{'reports':>10} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'avg hits':>9}")
+    for n in args.sizes:
+        t0 = time.perf_counter()
+        load(store, n, rng)
+        load_s = time.perf_counter() - t0
+
+        lat_ms, hits = [], []
+        for _ in range(args.queries):
+            lat, lon = random_point(rng)
+            t = time.perf_counter()
+            res = store.find_reports_near(lat, lon, radius_km=args.radius_km, limit=20)
+            lat_ms.append((time.perf_counter() - t) * 1000)
+            hits.append(len(res))
+            if args.check:
+                got = [f["properties"]["rid"] for f in res]
+                want = brute_force(store, lat, lon, args.radius_km, 20)
+                if got != want:
+                    sys.exit(f"Mismatch at ({lat:.4f},{lon:.4f}): {got[:5]} != {want[:5]}")
+
+        lat_ms.sort()
+        p95 = lat_ms[int(len(lat_ms) * 0.95) - 1]
+        print(f"{n:>10} {load_s:>8.1f} {statistics.median(lat_ms):>8.2f} {p95:>8.2f} "
+              f"{statistics.mean(hits):>9.1f}")
+
+if __name__ == "__main__":
+    main()
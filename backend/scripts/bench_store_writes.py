@@ -0,0 +1,95 @@
+from __future__ import annotations
+import os, time, random, sqlite3, argparse, tempfile, threading, statistics
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# --- Config ---
+THREADS = [1, 8, 32]   # concurrent writers (like threadpool request handlers)
+REPORTS = 4000         # add_report calls per run
+
+def get_args():
+    ap = argparse.ArgumentParser("Benchmark store.add_report under concurrent writers")
+    ap.add_argument("--threads", type=int, nargs="+", default=THREADS)
+    ap.add_argument("--reports", type=int, default=REPORTS)
+    ap.add_argument("--group-ms", type=float, default=None, help="group commit window (default: settings)")
+    ap.add_argument("--group-max", type=int, default=None, help="max writes per commit (default: settings)")
+    return ap.parse_args()
+
+class LegacyEngine:
+    """The previous write path: one shared connection, rollback journal, a commit per report."""
+
+    def __init__(self, path: Path) -> None:
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.lock = threading.Lock()  # sqlite3 serializes calls; this keeps each transaction whole
+        self.commits = self.writes = 0
+
+    def write(self, fn):
+        with self.lock, self.conn:
+            self.commits += 1
+            self.writes += 1
+            return fn(self.conn)
+
+    def reader(self):
+        return self.conn
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def stats(self) -> dict:
+        return {"avg_group": 1.0}
+
+def run(store, threads: int, n: int) -> tuple[float, list[float]]:
+    rng = random.Random(7)
+    points = [(rng.uniform(24.5, 49.5), rng.uniform(-125.0, -66.0)) for _ in range(n)]
+    lat_ms: list[float] = []
+
+    def one(p) -> None:
+        t = time.perf_counter()
+        store.add_report(p[0], p[1], "bench report", {"category": "road.flood", "severity": "low"})
+        lat_ms.append((time.perf_counter() - t) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, points))
+    return time.perf_counter() - t0, sorted(lat_ms)
+
+def main():
+    args = get_args()
+    tmp = Path(tempfile.mkdtemp(prefix="pulsemaps-bench-"))
+    # settings/store bind the DB path at import time
+    os.environ["DATA_DIR"] = str(tmp)
+    os.environ["REPORTS_DB"] = str(tmp / "bench_reports.db")
+    from backend.app.config.settings import settings
+    from backend.app.data import store
+    from backend.app.data.sqlite_engine import SQLiteEngine
+
+    group_ms = settings.SQLITE_GROUP_COMMIT_MS if args.group_ms is None else args.group_ms
+    group_max = settings.SQLITE_GROUP_COMMIT_MAX if args.group_max is None else args.group_max
+    legacy_db = tmp / "bench_legacy.db"
+    with sqlite3.connect(str(store.DB_PATH)) as src, sqlite3.connect(str(legacy_db)) as dst:
+        src.backup(dst)  # same schema, own file (journal mode is per database)
+    modes = {
+        "legacy": lambda: LegacyEngine(legacy_db),
+        "wal/1": lambda: SQLiteEngine(store.DB_PATH, group_max=1),
+        "wal/group": lambda: SQLiteEngine(store.DB_PATH, group_ms=group_ms, group_max=group_max),
+        # durable commits (an fsync each): grouping is what amortizes them
+        "full/1": lambda: SQLiteEngine(store.DB_PATH, group_max=1, synchronous="FULL"),
+        "full/group": lambda: SQLiteEngine(store.DB_PATH, group_ms=group_ms, group_max=group_max,
+                                           synchronous="FULL"),
+    }
+
+    print(f"{'mode':>10} {'threads':>8} {'reports/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'avg group':>10}")
+    for name, make in modes.items():
+        for threads in args.threads:
+            store.ENGINE.close()
+            store.ENGINE = make()
+            store.clear_reports()
+            store.ENGINE.commits = store.ENGINE.writes = 0
+            secs, lat_ms = run(store, threads, args.reports)
+            st = store.ENGINE.stats()
+            print(f"{name:>10} {threads:>8} {args.reports / secs:>10.0f} {statistics.median(lat_ms):>8.2f} "
+                  f"{lat_ms[int(len(lat_ms) * 0.99) - 1]:>8.2f} {st['avg_group']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
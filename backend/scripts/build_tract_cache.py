@@ -0,0 +1,12 @@
+from __future__ import annotations
+import time
+
+def main():
+    from backend.app.services.tracts import build_cache, SHAPEFILE
+
+    t0 = time.perf_counter()
+    path = build_cache()
+    print(f"Done. {SHAPEFILE.name} -> {path} in {time.perf_counter() - t0:.1f}s.")
+
+if __name__ == "__main__":
+    main()
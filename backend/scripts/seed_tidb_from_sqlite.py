@@ -1,21 +1,37 @@
 from __future__ import annotations
-import os, json, math, time, argparse
-from typing import List, Tuple
+import os, json, time, random, asyncio, argparse, hashlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 from tqdm import tqdm
 import sqlite3
 from sqlalchemy import create_engine, text
-from openai import OpenAI
 
 # --- Config ---
-EMBED_MODEL = "text-embedding-3-small"   # 1536-d
-BATCH_ROWS  = 100                         # rows per DB batch
-BATCH_EMB   = 64                          # texts per embed API call
+BATCH_ROWS   = 64     # rows per SQLite read = texts per embed call
+WRITE_ROWS   = 500    # rows per bulk upsert
+CONCURRENCY  = 4      # embed calls in flight
+MAX_ATTEMPTS = 8      # per embed batch (429s and transient errors)
+BACKOFF_BASE = 1.0    # seconds; doubles per 429, halves per success
+BACKOFF_CAP  = 60.0
 
 def get_args():
     ap = argparse.ArgumentParser("Seed TiDB from local SQLite reports")
     ap.add_argument("--sqlite", default=None,
                     help="Path to SQLite DB; default=backend/app/data/pulsemaps_reports.db (from settings)")
+    ap.add_argument("--target", default=None,
+                    help="SQLAlchemy URL to write to (default: TIDB_URL); sqlite:///file.db works as a stand-in")
+    ap.add_argument("--concurrency", type=int, default=CONCURRENCY, help="embedding calls in flight")
+    ap.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="rows per read / embed call")
+    ap.add_argument("--write-rows", type=int, default=WRITE_ROWS, help="rows per bulk upsert")
+    ap.add_argument("--checkpoint", default=None,
+                    help="Resume file (default: <sqlite>.seed.json); progress is saved after every write")
+    ap.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first row")
+    ap.add_argument("--offline", action="store_true",
+                    help="Fake embedder + sqlite:///seed_offline.db target (no network, no API key)")
+    ap.add_argument("--fake-embed", action="store_true", help="Deterministic hash vectors instead of the API")
+    ap.add_argument("--fake-latency-ms", type=float, default=50.0, help="simulated latency per fake embed call")
+    ap.add_argument("--fake-429", type=float, default=0.0, help="probability a fake embed call is rate limited")
     return ap.parse_args()
 
 def resolve_sqlite_path(cli_path: str | None) -> Path:
@@ -34,24 +50,42 @@ def resolve_sqlite_path(cli_path: str | None) -> Path:
     raise FileNotFoundError("Could not find SQLite DB. Pass --sqlite /path/to.db")
 
 def ensure_tidb_schema(engine):
-    ddl = """
-    CREATE TABLE IF NOT EXISTS reports (
-      id BIGINT PRIMARY KEY,
-      lat DOUBLE,
-      lon DOUBLE,
-      text TEXT,
-      props JSON,
-      created_at TIMESTAMP NULL,
-      embedding VECTOR(1536)
-    );
-    CREATE VECTOR INDEX IF NOT EXISTS idx_reports_embed
-    ON reports ((VEC_COSINE_DISTANCE(embedding))) USING HNSW;
-    """
+    # one schema (columns + geo/time/category/vector indexes) shared with the API
+    from backend.app.db.tidb import ensure_schema
+    ensure_schema(engine)
+
+def ensure_target_schema(engine):
+    if engine.dialect.name == "mysql":
+        ensure_tidb_schema(engine)
+        return
+    # stand-in target (offline runs): same columns, vectors kept as their text literal
     with engine.begin() as cx:
-        for stmt in ddl.strip().split(";"):
-            s = stmt.strip()
-            if s:
-                cx.execute(text(s))
+        cx.execute(text("""
+            CREATE TABLE IF NOT EXISTS reports (
+              id INTEGER PRIMARY KEY, lat REAL, lon REAL, text TEXT,
+              props TEXT, created_at TEXT, embedding TEXT
+            )
+        """))
+
+def upsert_sql(engine):
+    if engine.dialect.name == "mysql":
+        # INSERT ... ON DUPLICATE KEY UPDATE to be idempotent
+        return text("""
+            INSERT INTO reports (id, lat, lon, text, props, created_at, embedding)
+            VALUES (:id, :lat, :lon, :text, CAST(:props AS JSON), :created_at, :emb)
+            ON DUPLICATE KEY UPDATE
+              lat=VALUES(lat), lon=VALUES(lon), text=VALUES(text),
+              props=VALUES(props), created_at=VALUES(created_at),
+              embedding=VALUES(embedding)
+        """)
+    return text("""
+        INSERT INTO reports (id, lat, lon, text, props, created_at, embedding)
+        VALUES (:id, :lat, :lon, :text, :props, :created_at, :emb)
+        ON CONFLICT(id) DO UPDATE SET
+          lat=excluded.lat, lon=excluded.lon, text=excluded.text,
+          props=excluded.props, created_at=excluded.created_at,
+          embedding=excluded.embedding
+    """)
 
 def fetch_sqlite_rows(conn: sqlite3.Connection, last_id: int, limit: int) -> List[Tuple]:
     # Your SQLite schema: id, lat, lon, text, props_json, created_at
@@ -62,103 +96,253 @@ def fetch_sqlite_rows(conn: sqlite3.Connection, last_id: int, limit: int) -> Lis
     )
     return cur.fetchall()
 
-def embed_batch(client: OpenAI, texts: List[str]) -> List[List[float]]:
-    # batch to reduce roundtrips
-    out = client.embeddings.create(model=EMBED_MODEL, input=texts)
-    return [d.embedding for d in out.data]
+def embed_batch(texts: List[str]) -> List[str]:
+    # shared embedding cache: texts embedded by earlier runs (or the API) are not re-sent;
+    # the float32 batch is formatted to TiDB vector literals in one NumPy pass
+    from backend.app.services.embeddings import embed_texts
+    from backend.app.data.vectors import to_literals
+    return to_literals(embed_texts(texts))
 
-def chunked(lst, n):
-    for i in range(0, len(lst), n):
-        yield lst[i:i+n]
+class FakeRateLimit(Exception):
+    status_code = 429
 
-def main():
-    tidb_url = os.getenv("TIDB_URL")
-    if not tidb_url:
-        raise RuntimeError("TIDB_URL env not set")
-    if not os.getenv("OPENAI_API_KEY"):
-        raise RuntimeError("OPENAI_API_KEY env not set")
+def fake_embedder(latency_ms: float, p429: float) -> Callable[[List[str]], List[str]]:
+    """Deterministic unit vectors seeded by each text's hash, after a simulated API delay."""
+    import numpy as np
+    from backend.app.services.embeddings import EMBED_DIM
+    from backend.app.data.vectors import to_literals
 
-    args = get_args()
-    sqlite_path = resolve_sqlite_path(args.sqlite)
+    def embed(texts: List[str]) -> List[str]:
+        time.sleep(latency_ms / 1000.0)
+        if random.random() < p429:
+            raise FakeRateLimit("429 Too Many Requests (simulated)")
+        vecs = np.stack([
+            np.random.default_rng(int.from_bytes(hashlib.sha256(t.encode()).digest()[:8], "little"))
+              .standard_normal(EMBED_DIM).astype(np.float32)
+            for t in texts
+        ])
+        return to_literals(vecs / np.linalg.norm(vecs, axis=1, keepdims=True))
+    return embed
 
-    # Connect
-    engine = create_engine(tidb_url, pool_pre_ping=True)
-    ensure_tidb_schema(engine)
+def token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+        enc = tiktoken.get_encoding("cl100k_base")  # text-embedding-3-* tokenizer
+        return lambda s: len(enc.encode(s))
+    except Exception:
+        return lambda s: max(1, len(s) // 4)  # rough English average
 
-    sconn = sqlite3.connect(str(sqlite_path))
-    sconn.row_factory = sqlite3.Row
+def is_rate_limit(e: BaseException) -> bool:
+    return getattr(e, "status_code", None) == 429
 
-    # Find the last migrated id in TiDB
-    with engine.begin() as cx:
-        row = cx.execute(text("SELECT COALESCE(MAX(id), 0) FROM reports")).fetchone()
-        last_id = int(row[0] or 0)
+def retry_after(e: BaseException) -> Optional[float]:
+    try:
+        return float(e.response.headers["retry-after"])  # openai.RateLimitError carries the response
+    except Exception:
+        return None
 
-    print(f"Starting from id > {last_id} (SQLite: {sqlite_path})")
+class Backoff:
+    """One pause shared by every worker: grows on 429s, decays on successes."""
 
-    total_inserted = 0
-    with engine.begin() as cx:
-        # quick count just for progress (optional)
-        row = sconn.execute("SELECT COUNT(*) FROM reports WHERE id > ?", (last_id,)).fetchone()
-        todo = int(row[0] or 0)
+    def __init__(self, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> None:
+        self.base, self.cap = base, cap
+        self.delay = 0.0
+        self.until = 0.0
+        self.hits = 0
 
-    # Main loop
-    pbar = tqdm(total=todo, desc="Migrating", unit="rows")
-    client = OpenAI()
-
-    while True:
-        rows = fetch_sqlite_rows(sconn, last_id, BATCH_ROWS)
-        if not rows:
-            break
-
-        # Build embeddings in small batches
-        texts = [ (r["text"] or "User report") for r in rows ]
-        embs: List[List[float]] = []
-        for chunk in chunked(texts, BATCH_EMB):
-            # simple retry on rate limit
-            for attempt in range(4):
+    async def wait(self) -> None:
+        while (d := self.until - time.monotonic()) > 0:
+            await asyncio.sleep(d)
+
+    def rate_limited(self, hint: Optional[float] = None) -> None:
+        self.hits += 1
+        self.delay = min(self.cap, max(self.base, self.delay * 2))
+        pause = hint if hint is not None else self.delay * random.uniform(0.5, 1.0)
+        self.until = max(self.until, time.monotonic() + pause)
+
+    def succeeded(self) -> None:
+        self.delay = self.delay / 2 if self.delay > self.base else 0.0
+
+@dataclass
+class Batch:
+    seq: int
+    rows: List[Tuple]
+    embs: List[str] = field(default_factory=list)
+
+    @property
+    def last_id(self) -> int:
+        return int(self.rows[-1]["id"])
+
+class Checkpoint:
+    """
+    Highest source id below which every row is written. Batches finish out of
+    order, so it only advances over the contiguous run of written batches.
+    """
+
+    def __init__(self, path: Path, source: Path, last_id: int, rows: int) -> None:
+        self.path, self.source = path, source
+        self.last_id, self.rows = last_id, rows
+        self._next = 0
+        self._done: Dict[int, Batch] = {}
+
+    @classmethod
+    def load(cls, path: Path, source: Path, restart: bool) -> "Checkpoint":
+        if path.exists() and not restart:
+            c = json.loads(path.read_text())
+            if c.get("source") != str(source):
+                print(f"warning: checkpoint {path} was written for {c.get('source')}")
+            return cls(path, source, int(c.get("last_id", 0)), int(c.get("rows", 0)))
+        return cls(path, source, 0, 0)
+
+    def written(self, batches: List[Batch]) -> None:
+        for b in batches:
+            self._done[b.seq] = b
+        while self._next in self._done:
+            b = self._done.pop(self._next)
+            self.last_id = b.last_id
+            self.rows += len(b.rows)
+            self._next += 1
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"source": str(self.source), "last_id": self.last_id, "rows": self.rows}))
+        os.replace(tmp, self.path)
+
+def to_values(b: Batch) -> List[dict]:
+    values = []
+    for r, vec_literal in zip(b.rows, b.embs):
+        values.append({
+            "id": int(r["id"]),
+            "lat": float(r["lat"]) if r["lat"] is not None else None,
+            "lon": float(r["lon"]) if r["lon"] is not None else None,
+            "text": r["text"] or "",
+            "props": r["props_json"] or "{}",
+            "created_at": r["created_at"],  # ISO string in your schema
+            "emb": vec_literal,
+        })
+    return values
+
+async def run_pipeline(args, sconn: sqlite3.Connection, engine, ckpt: Checkpoint,
+                       embed: Callable[[List[str]], List[str]], pbar: tqdm) -> Dict[str, float]:
+    """
+    reader (SQLite, by id) -> embed_q -> N embed workers -> write_q -> bulk writer.
+    Bounded queues keep at most a few batches in memory and let a slow writer or
+    a rate-limited API push back on the reader.
+    """
+    embed_q: asyncio.Queue = asyncio.Queue(maxsize=2 * args.concurrency)
+    write_q: asyncio.Queue = asyncio.Queue(maxsize=2 * args.concurrency)
+    backoff = Backoff()
+    count_tokens = token_counter()
+    sql = upsert_sql(engine)
+    stats = {"rows": 0, "tokens": 0}
+    t0 = time.monotonic()
+
+    async def reader() -> None:
+        last_id, seq = ckpt.last_id, 0
+        while rows := await asyncio.to_thread(fetch_sqlite_rows, sconn, last_id, args.batch_rows):
+            await embed_q.put(Batch(seq, rows))
+            last_id, seq = int(rows[-1]["id"]), seq + 1
+        for _ in range(args.concurrency):
+            await embed_q.put(None)
+
+    async def embedder() -> None:
+        while (b := await embed_q.get()) is not None:
+            texts = [(r["text"] or "User report") for r in b.rows]
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                await backoff.wait()
                 try:
-                    embs.extend(embed_batch(client, chunk))
+                    b.embs = await asyncio.to_thread(embed, texts)
+                    backoff.succeeded()
                     break
                 except Exception as e:
-                    if attempt == 3:
+                    if attempt == MAX_ATTEMPTS:
                         raise
-                    time.sleep(1.5 * (attempt + 1))
+                    if is_rate_limit(e):
+                        backoff.rate_limited(retry_after(e))
+                    else:  # transient network/server error
+                        await asyncio.sleep(BACKOFF_BASE * attempt)
+            stats["tokens"] += sum(count_tokens(t) for t in texts)
+            await write_q.put(b)
+        await write_q.put(None)
 
-        # Prepare batched inserts
-        values = []
-        for r, emb in zip(rows, embs):
-            rid = int(r["id"])
-            lat = float(r["lat"]) if r["lat"] is not None else None
-            lon = float(r["lon"]) if r["lon"] is not None else None
-            txt = r["text"] or ""
-            props = r["props_json"] or "{}"
-            created = r["created_at"]  # ISO string in your schema
+    def write(batches: List[Batch]) -> None:
+        with engine.begin() as cx:
+            cx.execute(sql, [v for b in batches for v in to_values(b)])
 
-            vec_literal = "[" + ",".join(f"{x:.7f}" for x in emb) + "]"  # TiDB vector literal
+    async def writer() -> None:
+        open_workers = args.concurrency
+        while open_workers:
+            b = await write_q.get()
+            pending: List[Batch] = []
+            n = 0
+            # drain what is already queued (up to write_rows) so one round trip carries several batches
+            while True:
+                if b is None:
+                    open_workers -= 1
+                else:
+                    pending.append(b)
+                    n += len(b.rows)
+                if not open_workers or n >= args.write_rows or write_q.empty():
+                    break
+                b = write_q.get_nowait()
+            if not pending:
+                continue
+            await asyncio.to_thread(write, pending)
+            ckpt.written(pending)
+            stats["rows"] += n
+            dt = max(time.monotonic() - t0, 1e-9)
+            pbar.update(n)
+            pbar.set_postfix(rows_s=f"{stats['rows'] / dt:.0f}", tok_s=f"{stats['tokens'] / dt:.0f}",
+                             r429=backoff.hits, last_id=ckpt.last_id)
 
-            values.append({
-                "id": rid, "lat": lat, "lon": lon, "text": txt,
-                "props": props, "created_at": created, "emb": vec_literal
-            })
+    tasks = [asyncio.create_task(reader()), asyncio.create_task(writer())]
+    tasks += [asyncio.create_task(embedder()) for _ in range(args.concurrency)]
+    try:
+        # first failure wins; the rest are cancelled and the checkpoint keeps what was written
+        for fut in asyncio.as_completed(tasks):
+            await fut
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    stats["seconds"] = time.monotonic() - t0
+    stats["rate_limited"] = backoff.hits
+    return stats
 
-        # INSERT ... ON DUPLICATE KEY UPDATE to be idempotent
-        sql = text("""
-            INSERT INTO reports (id, lat, lon, text, props, created_at, embedding)
-            VALUES (:id, :lat, :lon, :text, CAST(:props AS JSON), :created_at, :emb)
-            ON DUPLICATE KEY UPDATE
-              lat=VALUES(lat), lon=VALUES(lon), text=VALUES(text),
-              props=VALUES(props), created_at=VALUES(created_at),
-              embedding=VALUES(embedding)
-        """)
-        with engine.begin() as cx:
-            cx.execute(sql, values)
+def main():
+    args = get_args()
+    fake = args.fake_embed or args.offline
+    target = args.target or os.getenv("TIDB_URL") or ("sqlite:///seed_offline.db" if args.offline else None)
+    if not target:
+        raise RuntimeError("TIDB_URL env not set (or pass --target / --offline)")
+    if not fake and not os.getenv("OPENAI_API_KEY"):
+        raise RuntimeError("OPENAI_API_KEY env not set (or pass --fake-embed / --offline)")
+
+    sqlite_path = resolve_sqlite_path(args.sqlite)
+    ckpt_path = Path(args.checkpoint) if args.checkpoint else sqlite_path.with_suffix(".seed.json")
+
+    # Connect
+    engine = create_engine(target, pool_pre_ping=True)
+    ensure_target_schema(engine)
 
-        last_id = int(rows[-1]["id"])
-        total_inserted += len(rows)
-        pbar.update(len(rows))
+    sconn = sqlite3.connect(str(sqlite_path), check_same_thread=False)
+    sconn.row_factory = sqlite3.Row
 
-    pbar.close()
-    print(f"Done. Migrated/updated {total_inserted} rows into TiDB.")
+    ckpt = Checkpoint.load(ckpt_path, sqlite_path, args.restart)
+    print(f"Starting from id > {ckpt.last_id} (SQLite: {sqlite_path}, checkpoint: {ckpt_path})")
+
+    # quick count just for progress
+    row = sconn.execute("SELECT COUNT(*) FROM reports WHERE id > ?", (ckpt.last_id,)).fetchone()
+    todo = int(row[0] or 0)
+
+    embed = fake_embedder(args.fake_latency_ms, args.fake_429) if fake else embed_batch
+    pbar = tqdm(total=todo, desc="Migrating", unit="rows")
+    try:
+        stats = asyncio.run(run_pipeline(args, sconn, engine, ckpt, embed, pbar))
+    finally:
+        pbar.close()
+    dt = max(stats["seconds"], 1e-9)
+    print(f"Done. Migrated/updated {stats['rows']} rows in {dt:.1f}s "
+          f"({stats['rows'] / dt:.1f} rows/s, {stats['tokens'] / dt:.0f} tokens/s, "
+          f"{stats['rate_limited']} rate-limited calls). Checkpoint at id {ckpt.last_id}.")
 
 if __name__ == "__main__":
     main()
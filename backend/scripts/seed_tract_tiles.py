@@ -0,0 +1,21 @@
+from __future__ import annotations
+import time, argparse
+
+def get_args():
+    ap = argparse.ArgumentParser("Pre-render census tract vector tiles into the disk cache")
+    ap.add_argument("--max-zoom", type=int, default=6)
+    ap.add_argument("--bounds", default=None,
+                    help="min_lon,min_lat,max_lon,max_lat; default covers the US")
+    return ap.parse_args()
+
+def main():
+    args = get_args()
+    from backend.app.services.tract_tiles import preseed, US_BOUNDS, TILES_DIR
+    bounds = tuple(float(v) for v in args.bounds.split(",")) if args.bounds else US_BOUNDS
+
+    t0 = time.perf_counter()
+    n = preseed(args.max_zoom, bounds)
+    print(f"Done. Wrote {n} tiles to {TILES_DIR} in {time.perf_counter() - t0:.1f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os, tempfile
+
+# settings bind the data dir at import time: point it at a scratch dir before any app import
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="pulsemaps-test-"))
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
@@ -0,0 +1,33 @@
+import pytest
+
+from backend.app.agents.local_classifier import classify_local
+from backend.app.config.settings import settings
+
+# (report text, the LLM's category). The local rules may defer (confidence under
+# the threshold), but when they answer on their own they must agree with it.
+CASES = [
+    ("film crew shooting a movie", "other.unknown"),
+    ("fireworks, not gunshots", "other.unknown"),
+    ("i didn't hear any gunshots", "other.unknown"),
+    ("my phone is missing", "incident.lost_item"),
+    ("flooding in my basement", "other.unknown"),
+    ("my dad is missing since this morning", "incident.missing_person"),
+    ("shots fired near the park", "crime.gunshot"),
+    ("there was a shooting, shots fired on 5th", "crime.gunshot"),
+    ("missing child last seen near the school", "incident.missing_person"),
+    ("main street is flooded", "road.flood"),
+    ("lost my wallet on the bus", "incident.lost_item"),
+]
+
+@pytest.mark.parametrize("text,llm", CASES)
+def test_local_answer_matches_llm(text, llm):
+    m = classify_local(text)
+    assert m.confidence < settings.CLASSIFIER_LOCAL_THRESHOLD or m.category == llm
+
+@pytest.mark.parametrize("text", [
+    "shots fired near the park",
+    "missing child last seen near the school",
+    "main street is flooded",
+])
+def test_clear_reports_stay_local(text):
+    assert classify_local(text).confidence >= settings.CLASSIFIER_LOCAL_THRESHOLD
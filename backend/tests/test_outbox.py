@@ -0,0 +1,33 @@
+import asyncio
+
+from backend.app.config.settings import settings
+from backend.app.data import store
+from backend.app.services import outbox
+
+def _states():
+    return dict(store.ENGINE.reader().execute(
+        "SELECT r.text, o.state FROM report_outbox o JOIN reports r ON r.id = o.report_id"
+    ).fetchall())
+
+def test_failing_row_does_not_dead_letter_its_batch(monkeypatch):
+    store.clear_reports()
+    for i in range(9):
+        store.add_report(40.0, -74.0 + i * 0.01, "bad" if i == 5 else f"ok{i}")
+    synced = []
+
+    def sync_batch(rows):
+        if any(r[4] == "bad" for r in rows):
+            raise ValueError("input too long")
+        synced.extend(r[1] for r in rows)
+
+    monkeypatch.setattr(outbox, "_sync_batch", sync_batch)
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 1)
+    worker = outbox.OutboxWorker()
+
+    assert asyncio.run(worker.drain_once()) == 8
+    states = _states()
+    assert states.pop("bad") == "dead"
+    assert set(states.values()) == {"done"}
+    assert len(synced) == 8
+    assert worker.failed == 1
+    store.clear_reports()
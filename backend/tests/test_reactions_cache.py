@@ -0,0 +1,30 @@
+import asyncio, time
+
+from backend.app.config.settings import settings
+from backend.app.services import reactions
+
+def test_counters_survive_eviction_during_read(monkeypatch):
+    """A hit taken before a slow miss read may be evicted meanwhile; it must be reloaded."""
+    monkeypatch.setattr(settings, "REACTIONS_CACHE_SIZE", 2)
+    reactions._counts.clear()
+    read = reactions._read_counts
+
+    def slow_read(rids):
+        if "c" in rids:
+            time.sleep(0.2)
+        return read(rids)
+
+    monkeypatch.setattr(reactions, "_read_counts", slow_read)
+
+    async def run():
+        await reactions.get_many(["a"])
+        await reactions.get_many(["b"])
+        slow = asyncio.create_task(reactions.get_many(["a", "c"]))
+        await asyncio.sleep(0.05)  # slow is now waiting on the read for c, holding a as a hit
+        await reactions.get_many(["d", "e"])  # evicts a
+        return await slow
+
+    out = asyncio.run(run())
+    assert set(out) == {"a", "c"}
+    assert out["a"]["verify_count"] == 0
+    assert len(reactions._counts) <= settings.REACTIONS_CACHE_SIZE
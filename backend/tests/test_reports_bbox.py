@@ -0,0 +1,25 @@
+import pytest
+
+from backend.app.data import store
+
+@pytest.fixture
+def reports():
+    store.clear_reports()
+    for lat, lon, text in [(39.0, 175.0, "east"), (39.0, -175.0, "west"), (39.0, 0.0, "greenwich")]:
+        store.add_report(lat, lon, text)
+    yield
+    store.clear_reports()
+
+def _texts(fc):
+    return sorted(f["properties"]["text"] for f in fc["features"])
+
+def test_bbox(reports):
+    assert _texts(store.get_feature_collection(bbox=(-10, 38, 10, 40))) == ["greenwich"]
+
+def test_bbox_across_antimeridian(reports):
+    box = (170, 38, -170, 40)
+    assert _texts(store.get_feature_collection(bbox=box)) == ["east", "west"]
+    assert sorted(f["properties"]["text"] for f in store.iter_reports(bbox=box)) == ["east", "west"]
+    assert sorted(r[0] for r in store.filter_reports(box)) == sorted(
+        r[0] for r in store.filter_reports((170, 38, 180, 40)) + store.filter_reports((-180, 38, -170, 40))
+    )